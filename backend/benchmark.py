@@ -0,0 +1,223 @@
+# backend/benchmark.py
+"""
+End-to-end load test for the brainstorm API.
+
+Drives the same sequence of calls as brainstorm_client.py (auto-selecting the best-scored
+variant instead of prompting) for many sessions at once, then reports throughput and
+p50/p95/p99 latency per endpoint.
+
+By default the app runs in-process against the offline fake LLM (LLM_BACKEND=fake), so it
+needs no network and measures the backend's own overhead plus the simulated model time:
+
+    python benchmark.py --sessions 20 --concurrency 10 --latency-scale 0.05
+
+Pass --base-url to drive an already running server over HTTP instead.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+FREEWRITING_TOPICS = (
+    "collecting client feedback from email, Slack, Figma comments and voicemail into one inbox",
+    "helping small restaurants predict ingredient waste from their point-of-sale data",
+    "matching volunteer tutors with students based on schedules and subjects",
+    "a tool that turns meeting recordings into tracked action items",
+)
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class InProcessTransport:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    async def post(self, endpoint, payload):
+        response = await self.client.post(f"/api/brainstorm{endpoint}", json=payload)
+        return response.status_code, await response.get_json()
+
+
+class HttpTransport:
+    def __init__(self, base_url, max_workers):
+        self.base_url = base_url.rstrip("/")
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _post(self, endpoint, payload):
+        request = urllib.request.Request(
+            f"{self.base_url}{endpoint}", data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b"{}")
+
+    async def post(self, endpoint, payload):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._post, endpoint, payload)
+
+
+class Recorder:
+    def __init__(self, transport):
+        self.transport = transport
+        self.latencies = {}  # endpoint -> [seconds]
+        self.errors = {}  # endpoint -> count
+
+    async def call(self, endpoint, payload):
+        started = time.perf_counter()
+        try:
+            status, body = await self.transport.post(endpoint, payload)
+        except Exception as e:
+            status, body = None, {"error": str(e)}
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - started)
+        if status is None or status >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            raise RuntimeError(f"{endpoint} failed with status {status}: {(body or {}).get('error')}")
+        return (body or {}).get("data")
+
+
+async def run_session(recorder, index, args):
+    call = recorder.call
+    freewriting = f"Session {index}: I keep thinking about {FREEWRITING_TOPICS[index % len(FREEWRITING_TOPICS)]}. Not sure how it would work yet."
+
+    themes = await call("/refine/themes", {"freewriting": freewriting})
+    context_input = await call("/refine/context", {"freewriting": freewriting})
+    clarification = await call("/refine/clarification", {"context_input": context_input})
+    pushback = await call("/refine/pushback", {"context_input": context_input, "themes": themes})
+    combined_context = {
+        "context": context_input,
+        "clarification": clarification,
+        "detail_answer": "Use sender role, keywords, and explicit deadline dates to determine urgency.",
+        "pushback_summary": (pushback or {}).get("summary_of_pushback"),
+        "curiosity_question": (pushback or {}).get("curiosity_question"),
+        "pushback_response": "Integrations matter most; onboarding must be effortless."
+    }
+    session_id = (await call("/session", {"stages": {"combined_context": combined_context}}))["session_id"]
+    core_problem = await call("/refine/core_problem", {"context_input": context_input, "clarification": clarification})
+    creative_expansion, cross_analogs = await asyncio.gather(
+        call("/refine/creative_expansion", {"core_problem": core_problem, "combined_context": combined_context}),
+        call("/refine/cross_analogs", {"core_problem": core_problem, "combined_context": combined_context})
+    ) if args.parallel_client else (
+        await call("/refine/creative_expansion", {"core_problem": core_problem, "combined_context": combined_context}),
+        await call("/refine/cross_analogs", {"core_problem": core_problem, "combined_context": combined_context})
+    )
+    variants = (creative_expansion or {}).get("scamper_variations", []) + (cross_analogs or {}).get("hybrid_concepts", [])
+    variant_results = await call("/refine/variants/evaluate", {
+        "all_idea_variants": variants,
+        "variant_context": {"context": context_input, "clarification": clarification, "detail_answer": combined_context["detail_answer"]}
+    })
+    best = max(variant_results, key=lambda v: sum((v.get("feasibility") or {}).get(k, 0) or 0 for k in ("technical_feasibility", "market_feasibility", "novelty")))
+    selected_idea = best["idea"]
+
+    research_results = await call("/research/run", {"selected_idea": selected_idea, "num_rounds": args.research_rounds, "session_id": session_id})
+    summary = await call("/research/summary", {"research_results": research_results, "selected_idea": selected_idea})
+    research_summary = (summary or {}).get("research_summary", "Summary failed.")
+    await call("/debate/run", {"selected_idea": selected_idea, "research_summary": research_summary, "num_rounds": args.debate_rounds, "session_id": session_id})
+    await call("/feature_ideation", {"session_id": session_id})
+    await call("/competitive_analysis", {"session_id": session_id})
+    await call("/mvp_roadmap", {"session_id": session_id})
+    if not args.skip_report:
+        await call("/report/generate_full", {"session_id": session_id})
+
+
+async def run_benchmark(args, transport):
+    recorder = Recorder(transport)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failures = []
+
+    async def one(index):
+        async with semaphore:
+            try:
+                await run_session(recorder, index, args)
+            except Exception as e:
+                failures.append(f"session {index}: {e}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.sessions)))
+    wall = time.perf_counter() - started
+
+    total_requests = sum(len(v) for v in recorder.latencies.values())
+    report = {
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "failed_sessions": len(failures),
+        "wall_seconds": round(wall, 3),
+        "sessions_per_second": round((args.sessions - len(failures)) / wall, 4) if wall else None,
+        "requests_per_second": round(total_requests / wall, 3) if wall else None,
+        "endpoints": {
+            endpoint: {
+                "count": len(values),
+                "errors": recorder.errors.get(endpoint, 0),
+                "p50": round(percentile(values, 50), 4),
+                "p95": round(percentile(values, 95), 4),
+                "p99": round(percentile(values, 99), 4),
+                "max": round(max(values), 4),
+            }
+            for endpoint, values in recorder.latencies.items()
+        },
+        "failures": failures[:20],
+    }
+    return report
+
+
+def print_report(report):
+    print(f"\n{report['sessions']} sessions, concurrency {report['concurrency']}, {report['failed_sessions']} failed")
+    print(f"wall {report['wall_seconds']}s | {report['sessions_per_second']} sessions/s | {report['requests_per_second']} requests/s\n")
+    print(f"{'endpoint':<32}{'count':>7}{'errors':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for endpoint, row in report["endpoints"].items():
+        print(f"{endpoint:<32}{row['count']:>7}{row['errors']:>8}{row['p50']:>10.3f}{row['p95']:>10.3f}{row['p99']:>10.3f}{row['max']:>10.3f}")
+    for failure in report["failures"]:
+        print(f"  ! {failure}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10, help="Total brainstorm sessions to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="Sessions in flight at once")
+    parser.add_argument("--research-rounds", type=int, default=3)
+    parser.add_argument("--debate-rounds", type=int, default=3)
+    parser.add_argument("--skip-report", action="store_true", help="Stop after the MVP roadmap")
+    parser.add_argument("--parallel-client", action="store_true", help="Issue independent client calls concurrently")
+    parser.add_argument("--base-url", help="Benchmark a running server, e.g. http://127.0.0.1:5000/api/brainstorm")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier on the fake LLM's latency (in-process only)")
+    parser.add_argument("--seed", type=int, default=0, help="Fake LLM seed (in-process only)")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    if args.base_url:
+        transport = HttpTransport(args.base_url, max_workers=args.concurrency * 4)
+        app = None
+    else:
+        # Configure the app before importing it: it reads its settings at import time
+        os.environ.setdefault("LLM_BACKEND", "fake")
+        os.environ["FAKE_LLM_LATENCY_SCALE"] = str(args.latency_scale)
+        os.environ["FAKE_LLM_SEED"] = str(args.seed)
+        from brainstorm1 import app
+        transport = InProcessTransport(app)
+
+    async def run():
+        if app is None:
+            return await run_benchmark(args, transport)
+        async with app.test_app():
+            return await run_benchmark(args, transport)
+
+    report = asyncio.run(run())
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,57 @@
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
+import asyncio
 import json
 import os
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+import re
+import time
+from quart import Quart, has_request_context, jsonify, make_response, request, stream_with_context
+from quart_cors import cors
+from compaction import compact_sections
+from convergence import DebateConvergence, ResearchNovelty
+from jobs import JobNotFound, JobQueue, create_job_store, report_progress
+from llm_cache import ResponseCache, SingleFlight, make_cache_key
+from metrics import CallMetrics
+from model_routing import ModelRouter
+from pipeline import Stage, gather_bounded, run_stages
+from similarity import cluster_near_duplicates
+from scheduler import BULK, CallScheduler, priority
+from sessions import SessionNotFound, create_session_store
+from speculation import Prefetcher, speculating
+from streaming import JsonStringFieldStream, format_sse
+from templates import TemplateRegistry
+from structured_logging import configure_logging, sample_payload
+
+# JSON log lines go through a queue to a background writer thread; full model payloads are
+# only serialized for a small sample of calls.
+logger = configure_logging(
+    level=os.environ.get("LOG_LEVEL", "INFO"),
+    sample_rate=float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", "0.01")),
+    payload_max_chars=int(os.environ.get("LOG_PAYLOAD_MAX_CHARS", "4000")),
+)
 
-app = Flask(__name__)
-CORS(app) # Enable CORS for all routes
+# Quart is the asyncio port of Flask: the same routing API, but handlers are coroutines
+# so one process can hold many requests that are just waiting on Claude.
+app = Quart(__name__)
+app = cors(app, allow_origin="*") # Enable CORS for all routes
+
+# LLM_BACKEND=fake swaps in an offline stand-in that synthesizes schema-valid tool outputs
+# (see fake_llm.py), for load-testing the backend without network access.
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "anthropic")
+if LLM_BACKEND == "fake":
+    from fake_llm import FakeAsyncAnthropic
+    client = FakeAsyncAnthropic(
+        seed=int(os.environ.get("FAKE_LLM_SEED", "0")),
+        latencies=json.loads(os.environ.get("FAKE_LLM_LATENCIES", "{}")),
+        latency_scale=float(os.environ.get("FAKE_LLM_LATENCY_SCALE", "1.0")),
+    )
+else:
+    # Initialize the client with an API key
+    # Retries are left to the call schedulers, which also pace calls against the rate limits
+    client = AsyncAnthropic(max_retries=0, api_key="sk-ant-REDACTED")
 
-# Initialize the client with an API key
-client = Anthropic(api_key="sk-ant-REDACTED")
-MODEL = "claude-3-7-sonnet-20250219"
+# Which model each call uses: short extractions and scoring go to the small tier, everything
+# else to the large one. MODEL_ROUTING_CONFIG points at a JSON file overriding the table.
+model_router = ModelRouter.from_config(os.environ.get("MODEL_ROUTING_CONFIG"))
 
 freewriting = (
     "okay so I’ve been thinking a lot about how I get feedback from people — like, not just reviews but random stuff — a DM here, some notes in a doc, comments on a Figma file, a voicemail even. "
@@ -22,34 +64,317 @@ freewriting = (
     "but also useful. anyway just brain dumping."
 )
 
-def run_claude_tool(tool_name, tool_schema, query):
+# Cache of tool outputs keyed by everything sent to the model. Set LLM_CACHE_SQLITE_PATH
+# to also keep entries on disk across restarts; LLM_CACHE_ENABLED=0 turns it off.
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") != "0"
+CACHE_TTLS = {
+    # Research and debate outputs are the most likely to be re-run for a fresh take
+    **{agent_name: 6 * 3600 for agent_name in (
+        "user_psychology", "business_value", "market_research", "integration_tech", "future_trends",
+        "market_intelligence", "competitive_analysis", "analogical_synthesis", "contrarian_research"
+    )},
+    "agent_debate_round": 6 * 3600,
+    "generate_full_report": 6 * 3600,
+}
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1024")),
+    default_ttl=int(os.environ.get("LLM_CACHE_TTL", str(24 * 3600))),
+    tool_ttls=CACHE_TTLS,
+    sqlite_path=os.environ.get("LLM_CACHE_SQLITE_PATH"),
+    sqlite_max_entries=int(os.environ.get("LLM_CACHE_SQLITE_MAX_ENTRIES", "10000")),
+)
+
+# Identical calls that arrive while one is already in flight (double clicks, re-renders,
+# retries from the frontend) share that call instead of each paying for their own.
+# Keyed like the cache, and independent of it, so it still works with LLM_CACHE_ENABLED=0.
+LLM_COALESCE_ENABLED = os.environ.get("LLM_COALESCE_ENABLED", "1") != "0"
+in_flight_calls = SingleFlight()
+
+# Server-side sessions: each stage's output is stored under the session so later calls
+# can send a session_id instead of re-posting combined_context and earlier results.
+session_store = create_session_store(
+    sqlite_path=os.environ.get("SESSION_DB_PATH"),
+    max_sessions=int(os.environ.get("SESSION_MAX_IN_MEMORY", "1000")),
+)
+
+# Opt-in per session: background prefetches of the likely next stage, capped in model tokens
+prefetcher = Prefetcher(session_store, default_budget_tokens=int(os.environ.get("SPECULATION_BUDGET_TOKENS", "100000")))
+
+@app.errorhandler(SessionNotFound)
+async def handle_session_not_found(e):
+    return jsonify({"error": f"Unknown session_id: {e.args[0]}"}), 404
+
+async def get_request_data(*session_fields):
+    # Fields missing from the body are filled in from the session, when one is given
+    data = await request.get_json() or {}
+    session_id = data.get('session_id')
+    if session_id:
+        if not session_store.exists(session_id):
+            raise SessionNotFound(session_id)
+        for field in session_fields:
+            if data.get(field) is None:
+                value = session_store.get_stage(session_id, field)
+                if value is not None:
+                    data[field] = value
+    return data
+
+def save_to_session(data, stage, value):
+    if data.get('session_id'):
+        session_store.set_stage(data['session_id'], stage, value)
+
+def update_session_stage(data, stage, update):
+    # Read-modify-write without an await in between, so concurrent requests can't interleave
+    if data.get('session_id'):
+        session_store.set_stage(data['session_id'], stage, update(session_store.get_stage(data['session_id'], stage)))
+
+def build_report_context(stages):
+    return dict(
+        stages.get('combined_context') or {},
+        core_problem=stages.get('core_problem'),
+        research_summary=stages.get('research_summary'),
+        debate_log=stages.get('debate_log'),
+        feature_ideation=stages.get('feature_ideation'),
+        competitive_analysis=stages.get('competitive_analysis'),
+        mvp_roadmap=stages.get('mvp_roadmap')
+    )
+
+# Per-call latency/token records, exposed at /metrics and /api/brainstorm/debug/calls
+call_metrics = CallMetrics(capacity=int(os.environ.get("METRICS_RING_SIZE", "1000")), tier_of=model_router.tier_of)
+
+def current_endpoint():
+    # Route pattern rather than path, so session IDs don't explode metric label cardinality
+    if has_request_context() and request.url_rule is not None:
+        return request.url_rule.rule
+    return None
+
+def usage_fields(usage):
+    if usage is None:
+        return None
+    return {field: getattr(usage, field, None) for field in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")}
+
+# Every call goes through its tier's scheduler: RPM/TPM token buckets (input tokens, as the
+# API counts them), retry-after aware jittered backoff, and interactive-before-bulk ordering.
+# Rate limits are per model, so each tier has its own buckets (LLM_RPM_SMALL etc. override
+# LLM_RPM/LLM_TPM for one tier). 0 disables a bucket; the fake backend has no limits to respect.
+def tier_scheduler(tier):
+    default_rpm = os.environ.get("LLM_RPM", "0" if LLM_BACKEND == "fake" else "50")
+    default_tpm = os.environ.get("LLM_TPM", "0" if LLM_BACKEND == "fake" else "40000")
+    return CallScheduler(
+        requests_per_minute=int(os.environ.get(f"LLM_RPM_{tier.upper()}", default_rpm)),
+        tokens_per_minute=int(os.environ.get(f"LLM_TPM_{tier.upper()}", default_tpm)),
+        max_retries=int(os.environ.get("LLM_MAX_RETRIES", "4")),
+    )
+
+call_schedulers = {tier: tier_scheduler(tier) for tier in model_router.tiers}
+
+def scheduler_for(request_args):
+    return call_schedulers[model_router.tier_of(request_args["model"])]
+
+# Tool schemas are compiled (serialized, hashed, measured) once when they're registered
+# below the tool definitions; prompt templates are registered next to the code using them.
+templates = TemplateRegistry()
+
+def estimate_request_tokens(request_args, tools):
+    # The tool list's size was measured when it was compiled
+    return tools.tokens + len(json.dumps([request_args.get("system"), request_args["messages"]], ensure_ascii=False)) // 4
+
+def billed_input_tokens(usage):
+    # Cache reads don't count against the input-token rate limit
+    return (getattr(usage, "input_tokens", 0) or 0) + (getattr(usage, "cache_creation_input_tokens", 0) or 0)
+
+def log_retry(tool_name):
+    def on_retry(error, attempt, delay):
+        logger.warning(f"Retrying {tool_name} in {delay:.2f}s after attempt {attempt + 1} failed: {error}")
+    return on_retry
+
+def cached_text_block(text):
+    # Marks a stable prompt prefix for Anthropic prompt caching; everything up to and
+    # including this block is reused by later calls that send the same prefix.
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+
+def build_tool_request(tool_name, tool_schema, query, system=None):
+    # `query` and `system` may be plain strings or lists of content blocks (see cached_text_block).
+    # Returns the request and the compiled tool list it uses (see the template registry).
+    tools = templates.tools_for(tool_name, tool_schema)
+    _, model = model_router.route(tool_name, current_endpoint())
     # Determine max_tokens based on tool_name
     max_tokens_for_call = 16384 if tool_name == "generate_full_report" else 4096
-
-    response = client.messages.create(
-        model=MODEL,
-        max_tokens=max_tokens_for_call, # Use adjusted max_tokens
-        tools=tool_schema,
-        tool_choice={"type": "tool", "name": tool_name},
-        messages=[{"role": "user", "content": query}]
+    request_args = {
+        "model": model,
+        "max_tokens": max_tokens_for_call, # Use adjusted max_tokens
+        "tools": tools.schema,
+        "tool_choice": {"type": "tool", "name": tool_name},
+        "messages": [{"role": "user", "content": query}]
+    }
+    if system:
+        request_args["system"] = system
+    return request_args, tools
+
+def request_cache_key(request_args, tools):
+    # Tools are represented by their precomputed hash instead of being serialized again;
+    # prompt versions let a template change invalidate cached outputs on its own.
+    fields = {name: value for name, value in request_args.items() if name != "tools"}
+    tool_name = request_args["tool_choice"]["name"]
+    return make_cache_key(**fields, tools=tools.hash, prompt_version=templates.version_of(tool_name))
+
+async def run_claude_tool(tool_name, tool_schema, query, system=None, use_cache=True):
+    request_args, tools = build_tool_request(tool_name, tool_schema, query, system)
+
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    cache_key = request_cache_key(request_args, tools) if use_cache or LLM_COALESCE_ENABLED else None
+    if use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Cache hit for {tool_name} ({cache_key[:12]})")
+            call_metrics.record(tool_name, current_endpoint(), request_args["model"], cache_hit=True)
+            return cached
+
+    prefetcher.check_budget() # Only stops prefetches, and only once they have spent their session's budget
+    if not LLM_COALESCE_ENABLED:
+        return await call_claude_tool(tool_name, request_args, tools, cache_key if use_cache else None)
+    started = time.perf_counter()
+    result, coalesced = await in_flight_calls.do(
+        cache_key, lambda: call_claude_tool(tool_name, request_args, tools, cache_key if use_cache else None),
+        detachable=speculating.get() is not None
+    )
+    if coalesced:
+        logger.debug(f"Coalesced {tool_name} onto an identical call in flight ({cache_key[:12]})")
+        call_metrics.record(tool_name, current_endpoint(), request_args["model"], latency=time.perf_counter() - started, coalesced=True)
+    return result
+
+def find_tool_input(content_blocks, tool_name):
+    return next((content.input for content in content_blocks if content.type == "tool_use" and content.name == tool_name), None)
+
+def incomplete_output(tools, tool_name, tool_input, stop_reason):
+    # Quality signal for comparing model tiers: no tool call, cut off, or required fields missing
+    if tool_input is None or stop_reason == "max_tokens":
+        return True
+    schema = next((tool["input_schema"] for tool in tools.source if tool["name"] == tool_name), {})
+    return any(field not in tool_input for field in schema.get("required", []))
+
+async def call_claude_tool(tool_name, request_args, tools, cache_key=None):
+    # The uncached half of run_claude_tool: one scheduled API call, recorded and logged
+    estimated_tokens = estimate_request_tokens(request_args, tools)
+    call_scheduler = scheduler_for(request_args)
+    started = time.perf_counter()
+    try:
+        response, retries = await call_scheduler.run(
+            lambda: client.messages.create(**request_args), estimated_tokens, on_retry=log_retry(tool_name)
+        )
+    except Exception as e:
+        call_metrics.record(tool_name, current_endpoint(), request_args["model"], latency=time.perf_counter() - started,
+                            retries=getattr(e, "retries_taken", 0), error=str(e))
+        raise
+    call_scheduler.settle(estimated_tokens, billed_input_tokens(response.usage))
+    prefetcher.charge(billed_input_tokens(response.usage) + response.usage.output_tokens)
+    tool_input = find_tool_input(response.content, tool_name)
+    call_metrics.record(
+        tool_name, current_endpoint(), request_args["model"],
+        latency=time.perf_counter() - started,
+        usage=usage_fields(response.usage),
+        stop_reason=response.stop_reason,
+        retries=retries,
+        incomplete=incomplete_output(tools, tool_name, tool_input, response.stop_reason)
     )
     # Log the raw response for debugging, especially for the report generation
-    print(f"--- Raw Anthropic Response for {tool_name} (Max Tokens: {max_tokens_for_call}) ---")
-    print(f"Response ID: {response.id}")
-    print(f"Response Model: {response.model}")
-    print(f"Response Stop Reason: {response.stop_reason}")
-    print(f"Response Stop Sequence: {response.stop_sequence}")
-    print(f"Response Usage: {response.usage}")
-    print(f"Response Content: {response.content}") # Print the content list
-    print("--- End Raw Response ---")
-
-    for content in response.content:
-        if content.type == "tool_use" and content.name == tool_name:
-            return content.input
-    # If the loop finishes without finding the tool_use, log and return {}
-    print(f"Warning: Tool use '{tool_name}' not found in response content:")
+    logger.info(f"Anthropic response for {tool_name}", extra={
+        "tool": tool_name,
+        "response_id": response.id,
+        "model": response.model,
+        "max_tokens": request_args["max_tokens"],
+        "stop_reason": response.stop_reason,
+        "stop_sequence": response.stop_sequence,
+        "usage": usage_fields(response.usage),
+        "payload": sample_payload(response.content)
+    })
+
+    if tool_input is not None:
+        if cache_key is not None:
+            response_cache.set(cache_key, tool_name, tool_input)
+        return tool_input
+    # No tool_use for this tool in the response: log and return {}
+    logger.warning(f"Tool use '{tool_name}' not found in response content")
     return {}
 
+async def stream_claude_tool(tool_name, tool_schema, query, system=None, use_cache=True):
+    """
+    Streaming counterpart of run_claude_tool. Yields ("input_json", fragment) for each piece
+    of the tool input as Claude writes it, then ("result", tool_input, final_message).
+    A cache hit yields the whole cached input as a single fragment and final_message None.
+    """
+    request_args, tools = build_tool_request(tool_name, tool_schema, query, system)
+
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    if use_cache:
+        cache_key = request_cache_key(request_args, tools)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Cache hit for {tool_name} ({cache_key[:12]})")
+            call_metrics.record(tool_name, current_endpoint(), request_args["model"], cache_hit=True, streamed=True)
+            yield ("input_json", json.dumps(cached))
+            yield ("result", cached, None)
+            return
+
+    endpoint = current_endpoint()
+    estimated_tokens = estimate_request_tokens(request_args, tools)
+    call_scheduler = scheduler_for(request_args)
+    on_retry = log_retry(tool_name)
+    started = time.perf_counter()
+    ttft = None
+    retries = 0
+    while True:
+        await call_scheduler.acquire(estimated_tokens)
+        try:
+            async with client.messages.stream(**request_args) as stream:
+                async for event in stream:
+                    if event.type == "content_block_delta":
+                        if ttft is None:
+                            ttft = time.perf_counter() - started
+                        if event.delta.type == "input_json_delta":
+                            yield ("input_json", event.delta.partial_json)
+                final_message = await stream.get_final_message()
+            break
+        except Exception as e:
+            # Once text has reached the client a retry would repeat it, so only retry before that
+            delay = call_scheduler.retry_delay(e, retries) if ttft is None else None
+            if delay is None:
+                call_metrics.record(tool_name, endpoint, request_args["model"], latency=time.perf_counter() - started, ttft=ttft,
+                                    retries=retries, error=str(e), streamed=True)
+                raise
+            call_scheduler.settle(estimated_tokens, 0)
+            on_retry(e, retries, delay)
+            retries += 1
+            await asyncio.sleep(delay)
+    call_scheduler.settle(estimated_tokens, billed_input_tokens(final_message.usage))
+    tool_input = find_tool_input(final_message.content, tool_name)
+    call_metrics.record(
+        tool_name, endpoint, request_args["model"],
+        latency=time.perf_counter() - started,
+        ttft=ttft,
+        usage=usage_fields(final_message.usage),
+        stop_reason=final_message.stop_reason,
+        retries=retries,
+        streamed=True,
+        incomplete=incomplete_output(tools, tool_name, tool_input, final_message.stop_reason)
+    )
+
+    logger.info(f"Streamed Anthropic response for {tool_name}", extra={
+        "tool": tool_name,
+        "response_id": final_message.id,
+        "model": final_message.model,
+        "max_tokens": request_args["max_tokens"],
+        "stop_reason": final_message.stop_reason,
+        "usage": usage_fields(final_message.usage),
+        "payload": sample_payload(final_message.content)
+    })
+    if tool_input is not None:
+        if use_cache:
+            response_cache.set(cache_key, tool_name, tool_input)
+    else:
+        logger.warning(f"Tool use '{tool_name}' not found in streamed response content")
+        tool_input = {}
+    yield ("result", tool_input, final_message)
+
 # === Step 1: Intake ===
 theme_tool = [{
     "name": "extract_themes",
@@ -110,6 +435,14 @@ constructive_pushback_tool = [{
     }
 }]
 
+# Same output as constructive_pushback, under its own name so the per-variant calls can be
+# routed (and measured) separately from the pushback the user answers
+variant_pushback_tool = [{
+    "name": "variant_pushback",
+    "description": "Summarizes the key risks and blindspots of one idea variant, then generates a follow-up question shown alongside it.",
+    "input_schema": constructive_pushback_tool[0]["input_schema"]
+}]
+
 core_problem_tool = [{
     "name": "summarize_core_problem",
     "description": "Summarizes the core problem, user pain, and constraints in a concise, actionable way for use in downstream prompts.",
@@ -178,6 +511,33 @@ feasibility_tool = [{
     }
 }]
 
+# Scores several variants against one copy of the shared context
+feasibility_batch_tool = [{
+    "name": "score_feasibility_batch",
+    "description": "Scores the feasibility of several idea variants given the same context and constraints.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "scores": {
+                "type": "array",
+                "description": "One entry per idea variant, identified by its variant_id.",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "variant_id": {"type": "integer"},
+                        "technical_feasibility": {"type": "number"},
+                        "market_feasibility": {"type": "number"},
+                        "novelty": {"type": "number"},
+                        "execution_risks": {"type": "string"}
+                    },
+                    "required": ["variant_id", "technical_feasibility", "market_feasibility", "novelty", "execution_risks"]
+                }
+            }
+        },
+        "required": ["scores"]
+    }
+}]
+
 # === Step 5: Research Layer ===
 # Expanded research agent schemas with summarized_insights and examples
 research_agents = [
@@ -355,14 +715,53 @@ research_agents = [
 ]
 
 @app.route('/api/brainstorm/research/available_agents', methods=['GET'])
-def get_available_research_agents():
+async def get_available_research_agents():
     agent_names = [agent['name'] for agent in research_agents]
     return jsonify({'phase': 'research', 'step': 'available_agents', 'data': agent_names})
 
+research_shared_prompt = templates.add_prompt("research_shared", """You are one of several research agents. Each request names the agent you are playing. Given the following idea and context, perform that agent's research and output your top insights for this round. It must be connected.
+
+You MUST include a 'summarized_insights' field: a list of 2-3 concise, actionable insights for this agent.
+
+Example for user_psychology: ['Users feel overwhelmed by fragmented feedback channels.', 'Timely feedback increases engagement by 30%.']
+Example for business_value: ['Centralizing feedback can reduce project delays by 15%.', 'Subscription model is most viable for SMBs.']
+Example for market_research: ['SMBs are underserved in feedback management tools.', 'Top competitors lack AI-driven triage.']
+Example for integration_tech: ['Email and Slack APIs are the most requested integrations.', 'Automated onboarding reduces friction.']
+Example for future_trends: ['AI-driven feedback triage is an emerging expectation.', 'Voice feedback is a rising trend.']
+
+<idea>
+{{selected_idea}}
+</idea>
+<context>
+{{combined_context}}
+</context>
+""", tools=[agent["name"] for agent in research_agents])
+
+async def compute_research_insight(selected_idea, agent_name, combined_context, round_num=1, previous_insights=None):
+    # The idea/context block is identical for every agent and round, so it goes in a cached
+    # system prefix together with the full (stable) list of agent tools; only the short user
+    # turn naming the agent and round changes between calls.
+    # Build the prompt for the research agent, including examples for summarized_insights
+    shared_prompt = research_shared_prompt.render(selected_idea=selected_idea, combined_context=json.dumps(combined_context, indent=2))
+    prompt = f"You are the {agent_name.replace('_', ' ').title()} Agent. Use the `{agent_name}` tool. This is round {round_num}."
+    if previous_insights:
+        # Last round's insights go in the user turn so the cached prefix stays identical across rounds
+        prompt += f"""
+
+Build on (and don't repeat) the agents' summarized insights from the previous round:
+{json.dumps(previous_insights, indent=2)}"""
+    # Call the Claude tool with the agent schema and prompt
+    return await run_claude_tool(
+        agent_name,
+        research_agents,
+        prompt,
+        system=[cached_text_block(shared_prompt)]
+    )
+
 @app.route('/api/brainstorm/research/agent', methods=['POST'])
-def run_research_agent():
+async def run_research_agent():
     # Parse incoming JSON request
-    data = request.get_json()
+    data = await get_request_data('selected_idea', 'combined_context')
     selected_idea = data.get('selected_idea')
     agent_name = data.get('agent_name')
     combined_context = data.get('combined_context')
@@ -378,37 +777,153 @@ def run_research_agent():
         return jsonify({"error": f"Agent '{agent_name}' not found"}), 404
 
     try:
-        # Build the prompt for the research agent, including examples for summarized_insights
-        prompt = f"""You are the {agent_name.replace('_', ' ').title()} Agent. Given the following idea and context, perform your research and output your top insights for this round. It must be connected.
-
-You MUST include a 'summarized_insights' field: a list of 2-3 concise, actionable insights for this agent.
-
-Example for user_psychology: ['Users feel overwhelmed by fragmented feedback channels.', 'Timely feedback increases engagement by 30%.']
-Example for business_value: ['Centralizing feedback can reduce project delays by 15%.', 'Subscription model is most viable for SMBs.']
-Example for market_research: ['SMBs are underserved in feedback management tools.', 'Top competitors lack AI-driven triage.']
-Example for integration_tech: ['Email and Slack APIs are the most requested integrations.', 'Automated onboarding reduces friction.']
-Example for future_trends: ['AI-driven feedback triage is an emerging expectation.', 'Voice feedback is a rising trend.']
-
-<idea>
-{selected_idea}
-</idea>
-<context>
-{json.dumps(combined_context, indent=2)}
-</context>
-This is round {round_num}.
-"""
-        # Call the Claude tool with the agent schema and prompt
-        agent_result = run_claude_tool(
-            agent_name,
-            [agent_schema],
-            prompt
-        )
+        agent_result = await compute_research_insight(selected_idea, agent_name, combined_context, round_num)
         # Return the agent's research output
+        update_session_stage(data, 'research_results', lambda results: {**(results or {}), agent_name: (results or {}).get(agent_name, []) + [agent_result]})
         return jsonify({'phase': 'research', 'step': 'agent_insight', 'agent_name': agent_name, 'round': round_num, 'data': agent_result})
     except Exception as e:
-        print(f"Error in /research/agent for agent {agent_name}: {e}")
+        logger.error(f"Error in /research/agent for agent {agent_name}: {e}")
         return jsonify({'phase': 'research', 'step': 'agent_insight', 'agent_name': agent_name, 'error': str(e)}), 500
 
+DEFAULT_RESEARCH_AGENTS = [
+    "market_intelligence",
+    "competitive_analysis",
+    "analogical_synthesis",
+    "contrarian_research"
+]
+RESEARCH_MAX_CONCURRENCY = int(os.environ.get("RESEARCH_MAX_CONCURRENCY", "8"))
+# Adaptive research treats num_rounds as a maximum and retires agents that stop finding anything new
+RESEARCH_ADAPTIVE = os.environ.get("RESEARCH_ADAPTIVE", "0") == "1"
+RESEARCH_MIN_NOVELTY = float(os.environ.get("RESEARCH_MIN_NOVELTY", "0.25"))
+
+def collect_summarized_insights(round_outputs):
+    return {agent_name: (output or {}).get("summarized_insights", []) for agent_name, output in round_outputs.items() if output}
+
+async def run_research_round(selected_idea, combined_context, agent_names, round_num, previous_insights=None, max_concurrency=RESEARCH_MAX_CONCURRENCY):
+    # Agents within a round don't read each other's output, so the whole round runs at once.
+    # A failing agent only loses its own output for this round.
+    async def attempt(agent_name):
+        try:
+            return await compute_research_insight(selected_idea, agent_name, combined_context, round_num, previous_insights), None
+        except Exception as e:
+            logger.error(f"Error in research round {round_num} for agent {agent_name}: {e}")
+            return None, str(e)
+
+    with priority(BULK):
+        outputs = await gather_bounded(attempt, agent_names, min(max_concurrency, RESEARCH_MAX_CONCURRENCY))
+    round_outputs = {agent_name: output for agent_name, (output, _) in zip(agent_names, outputs)}
+    errors = {agent_name: error for agent_name, (_, error) in zip(agent_names, outputs) if error}
+    return round_outputs, errors
+
+async def run_research_rounds(selected_idea, combined_context, agent_names, num_rounds, max_concurrency=RESEARCH_MAX_CONCURRENCY, novelty=None):
+    # Rounds stay sequential: round N+1 is prompted with round N's summarized_insights.
+    # With a ResearchNovelty, agents whose latest round added little new drop out of later rounds.
+    research_results = {agent_name: [] for agent_name in agent_names}
+    errors = {}
+    previous_insights = None
+    active_agents = list(agent_names)
+    retired_insights = {}
+    for round_num in range(1, num_rounds + 1):
+        if not active_agents:
+            break
+        round_outputs, round_errors = await run_research_round(selected_idea, combined_context, active_agents, round_num, previous_insights, max_concurrency)
+        for agent_name, output in round_outputs.items():
+            if output is not None:  # Failures are reported in errors instead
+                research_results[agent_name].append(output)
+        if round_errors:
+            errors[round_num] = round_errors
+        round_insights = collect_summarized_insights(round_outputs)
+        if novelty is not None:
+            for agent_name, insights in round_insights.items():
+                if novelty.observe(round_num, agent_name, insights):
+                    active_agents.remove(agent_name)
+                    # Its last insights stay in the prompt for the agents still going
+                    retired_insights[agent_name] = insights
+            if round_num < num_rounds and len(active_agents) < len(agent_names):
+                logger.info(f"Research round {round_num}: {len(active_agents)} of {len(agent_names)} agents continue")
+        previous_insights = {**retired_insights, **round_insights}
+    return research_results, errors
+
+def research_novelty(options):
+    # None unless adaptive mode is on for this request (or by default via RESEARCH_ADAPTIVE)
+    if not options.get('adaptive', RESEARCH_ADAPTIVE):
+        return None
+    return ResearchNovelty(min_novelty=float(options.get('min_novelty', RESEARCH_MIN_NOVELTY)))
+
+def validate_research_request(data):
+    agent_names = data.get('research_agents') or DEFAULT_RESEARCH_AGENTS
+    unknown_agents = [name for name in agent_names if name not in {agent['name'] for agent in research_agents}]
+    if unknown_agents:
+        return None, f"Unknown research agents: {unknown_agents}"
+    max_concurrency = data.get('max_concurrency', RESEARCH_MAX_CONCURRENCY)
+    if not isinstance(max_concurrency, int) or max_concurrency < 1:
+        return None, "'max_concurrency' must be a positive integer"
+    return agent_names, None
+
+@app.route('/api/brainstorm/research/round', methods=['POST'])
+async def run_research_round_endpoint():
+    data = await get_request_data('selected_idea', 'combined_context')
+    selected_idea = data.get('selected_idea')
+    combined_context = data.get('combined_context')
+    round_num = data.get('round_num', 1)
+    previous_insights = data.get('previous_insights') # {agent_name: [insights]} from the prior round
+
+    if not selected_idea or not combined_context:
+        return jsonify({"error": "Missing 'selected_idea' or 'combined_context' in request body"}), 400
+    agent_names, error = validate_research_request(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    if round_num == 1:
+        prefetcher.claim(data.get('session_id'), 'research', (selected_idea, combined_context))
+
+    try:
+        round_outputs, errors = await run_research_round(selected_idea, combined_context, agent_names, round_num, previous_insights, data.get('max_concurrency', RESEARCH_MAX_CONCURRENCY))
+        update_session_stage(data, 'research_results', lambda results: {
+            **(results or {}),
+            **{agent_name: (results or {}).get(agent_name, []) + [output] for agent_name, output in round_outputs.items() if output is not None}
+        })
+        return jsonify({'phase': 'research', 'step': 'round', 'round': round_num, 'data': round_outputs,
+                        'summarized_insights': collect_summarized_insights(round_outputs), 'errors': errors})
+    except Exception as e:
+        logger.error(f"Error in /research/round: {e}")
+        return jsonify({'phase': 'research', 'step': 'round', 'round': round_num, 'error': str(e)}), 500
+
+@app.route('/api/brainstorm/research/run', methods=['POST'])
+async def run_research_endpoint():
+    data = await get_request_data('selected_idea', 'combined_context')
+    selected_idea = data.get('selected_idea')
+    combined_context = data.get('combined_context')
+    num_rounds = data.get('num_rounds', 3)
+
+    if not selected_idea or not combined_context:
+        return jsonify({"error": "Missing 'selected_idea' or 'combined_context' in request body"}), 400
+    if not isinstance(num_rounds, int) or num_rounds < 1:
+        return jsonify({"error": "'num_rounds' must be a positive integer"}), 400
+    agent_names, error = validate_research_request(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        novelty = research_novelty(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "'min_novelty' must be a number"}), 400
+
+    # A matching prefetch is served through the response cache (or joined while in flight)
+    prefetcher.claim(data.get('session_id'), 'research', (selected_idea, combined_context))
+
+    try:
+        research_results, errors = await run_research_rounds(selected_idea, combined_context, agent_names, num_rounds, data.get('max_concurrency', RESEARCH_MAX_CONCURRENCY), novelty)
+        save_to_session(data, 'research_results', research_results)
+        response = {'phase': 'research', 'step': 'run', 'data': research_results, 'errors': errors}
+        if novelty is not None:
+            response['novelty'] = novelty.summary()
+        return jsonify(response)
+    except Exception as e:
+        logger.error(f"Error in /research/run: {e}")
+        return jsonify({'phase': 'research', 'step': 'run', 'error': str(e)}), 500
+
+
 # === Step 6: Multi-Agent Dialectical Debate ===
 AGENT_ROLES = [
     "Market Agent",
@@ -545,7 +1060,7 @@ full_report_tool = [{
     }
 }]
 
-# Tool for generating individual sections (kept for potential future use or reference, but not used by generate_full_report)
+# Tool for generating one report section at a time (the "sections" report mode)
 report_section_tool = [{
     "name": "generate_report_section",
     "description": "Generates a specific section of the final report.",
@@ -559,110 +1074,201 @@ report_section_tool = [{
     }
 }]
 
+# Cheap closing pass over the sections' TL;DRs in the "sections" report mode
+report_conclusion_tool = [{
+    "name": "conclude_report",
+    "description": "Writes the closing TL;DR and next steps of a brainstorm report from its section summaries.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "why_it_matters": {"type": "string", "description": "One sentence on why the idea matters."},
+            "next_steps": {"type": "array", "items": {"type": "string"}, "description": "3-5 concrete next steps, in order."},
+            "tldr": {"type": "string", "description": "A 1-2 sentence TL;DR of the whole report."}
+        },
+        "required": ["why_it_matters", "next_steps", "tldr"]
+    }
+}]
+
+# === Context Compaction ===
+# Late stages inline every earlier stage's output. Before building those prompts the
+# sections are stripped of chain_of_thought and repeated insights, serialized without
+# indentation, and the largest ones are summarized until they fit the endpoint's budget.
+CONTEXT_COMPACTION_ENABLED = os.environ.get("CONTEXT_COMPACTION_ENABLED", "1") != "0"
+CONTEXT_TOKEN_BUDGETS = {
+    "feature_ideation": int(os.environ.get("CONTEXT_BUDGET_FEATURE_IDEATION", "6000")),
+    "competitive_intelligence": int(os.environ.get("CONTEXT_BUDGET_COMPETITIVE_ANALYSIS", "8000")),
+    "mvp_roadmap": int(os.environ.get("CONTEXT_BUDGET_MVP_ROADMAP", "10000")),
+    "generate_full_report": int(os.environ.get("CONTEXT_BUDGET_FULL_REPORT", "20000")),
+    "generate_report_section": int(os.environ.get("CONTEXT_BUDGET_REPORT_SECTION", "6000")),
+}
+
+compact_section_tool = [{
+    "name": "compact_section",
+    "description": "Condenses one section of brainstorm context so it fits a length budget.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "summary": {
+                "type": "string",
+                "description": "The condensed section, keeping concrete facts, numbers, names, decisions and open disagreements."
+            }
+        },
+        "required": ["summary"]
+    }
+}]
+
+async def summarize_section(name, text, target_tokens):
+    prompt = f"""Condense the `{name}` section below to at most about {target_tokens * 3 // 4} words. It will be used as context for later brainstorm stages.
+Keep concrete facts, numbers, names, decisions and open disagreements. Drop repetition, hedging and reasoning narration. Plain compact prose or terse bullet points are fine.
+
+<section>
+{text}
+</section>
+
+Use the `compact_section` tool."""
+    result = await run_claude_tool("compact_section", compact_section_tool, prompt)
+    return (result or {}).get("summary")
+
+async def compact_context(tool_name, sections):
+    if not CONTEXT_COMPACTION_ENABLED:
+        return {name: value if isinstance(value, str) else json.dumps(value, indent=2) for name, value in sections.items()}
+    return await compact_sections(sections, CONTEXT_TOKEN_BUDGETS[tool_name], summarize_section, label=tool_name)
+
+
+# === Template Registry ===
+# Research agents and debate turns share a cached system prefix, so their tool lists are
+# marked for prompt caching too (tool definitions come first in the cached prefix).
+templates.add_tools(research_agents, cache_prefix=True)
+templates.add_tools(agent_debate_tool, cache_prefix=True)
+for tool_schema in (
+    theme_tool, context_tool, clarification_tool, constructive_pushback_tool, variant_pushback_tool, core_problem_tool,
+    meta_creativity_tool, cross_pollination_tool, feasibility_tool, feasibility_batch_tool, feature_ideation_tool,
+    competitive_intel_tool, roadmap_tool, research_summary_tool, summarize_debate_tool,
+    full_report_tool, report_section_tool, report_conclusion_tool, compact_section_tool
+):
+    templates.add_tools(tool_schema)
+
+
 # === Phase 1: Intake & Idea Refinement ===
 
+async def compute_themes(current_freewriting):
+    return await run_claude_tool(
+        "extract_themes",
+        theme_tool,
+        f"Extract themes from the following text and use the `extract_themes` tool.\n\n<freewriting>\n{current_freewriting}\n</freewriting>\n"
+    )
+
 @app.route('/api/brainstorm/refine/themes', methods=['POST'])
-def get_themes():
-    data = request.get_json()
+async def get_themes():
+    data = await get_request_data()
     current_freewriting = data.get('freewriting', freewriting) # Use provided or default
     try:
-        themes = run_claude_tool(
-            "extract_themes",
-            theme_tool,
-            f"Extract themes from the following text and use the `extract_themes` tool.\n\n<freewriting>\n{current_freewriting}\n</freewriting>\n"
-        )
+        themes = await compute_themes(current_freewriting)
+        save_to_session(data, 'themes', themes)
         return jsonify({'phase': 'refine', 'step': 'themes', 'data': themes})
     except Exception as e:
-        print(f"Error in /refine/themes: {e}")
+        logger.error(f"Error in /refine/themes: {e}")
         return jsonify({'phase': 'refine', 'step': 'themes', 'error': str(e)}), 500
 
+async def compute_context(current_freewriting):
+    return await run_claude_tool(
+        "intake_context",
+        context_tool,
+        f"Simulate the intake context step for someone trying to solve the problem described in this brainstorming text.\n\n<freewriting>\n{current_freewriting}\n</freewriting>\n\nNow use the `intake_context` tool to summarize goal, audience, and constraints.\n"
+    )
+
 @app.route('/api/brainstorm/refine/context', methods=['POST'])
-def get_context():
-    data = request.get_json()
+async def get_context():
+    data = await get_request_data()
     current_freewriting = data.get('freewriting', freewriting) # Use provided or default
     try:
-        context_input = run_claude_tool(
-            "intake_context",
-            context_tool,
-            f"Simulate the intake context step for someone trying to solve the problem described in this brainstorming text.\n\n<freewriting>\n{current_freewriting}\n</freewriting>\n\nNow use the `intake_context` tool to summarize goal, audience, and constraints.\n"
-        )
+        context_input = await compute_context(current_freewriting)
+        save_to_session(data, 'context_input', context_input)
         return jsonify({'phase': 'refine', 'step': 'context', 'data': context_input})
     except Exception as e:
-        print(f"Error in /refine/context: {e}")
+        logger.error(f"Error in /refine/context: {e}")
         return jsonify({'phase': 'refine', 'step': 'context', 'error': str(e)}), 500
 
+async def compute_clarification(context_input):
+    return await run_claude_tool(
+        "clarify_concept",
+        clarification_tool,
+        f"You are a concept clarification agent. Parse the following context for keywords, objectives, and assumptions. If any important detail is missing or ambiguous, set 'need_more_detail' to true and ask a specific follow-up question in 'missing_detail_question'. Otherwise, set 'need_more_detail' to false.\n\n<context>\n{json.dumps(context_input, indent=2)}\n</context>\n\nUse the `clarify_concept` tool to respond.\n"
+    )
+
 @app.route('/api/brainstorm/refine/clarification', methods=['POST'])
-def get_clarification():
-    data = request.get_json()
+async def get_clarification():
+    data = await get_request_data('context_input')
     context_input = data.get('context_input')
     if not context_input:
         return jsonify({"error": "Missing 'context_input' in request body"}), 400
     try:
-        clarification = run_claude_tool(
-            "clarify_concept",
-            clarification_tool,
-            f"You are a concept clarification agent. Parse the following context for keywords, objectives, and assumptions. If any important detail is missing or ambiguous, set 'need_more_detail' to true and ask a specific follow-up question in 'missing_detail_question'. Otherwise, set 'need_more_detail' to false.\n\n<context>\n{json.dumps(context_input, indent=2)}\n</context>\n\nUse the `clarify_concept` tool to respond.\n"
-        )
+        clarification = await compute_clarification(context_input)
+        save_to_session(data, 'clarification', clarification)
+        prefetch_after(data, 'clarification')
         return jsonify({'phase': 'refine', 'step': 'clarification', 'data': clarification})
     except Exception as e:
-        print(f"Error in /refine/clarification: {e}")
+        logger.error(f"Error in /refine/clarification: {e}")
         return jsonify({'phase': 'refine', 'step': 'clarification', 'error': str(e)}), 500
 
+async def compute_pushback(context_input, themes):
+    # Accept both list and dict for themes
+    if isinstance(themes, dict):
+        themes_list = themes.get('themes', [])
+    else:
+        themes_list = themes
+    return await run_claude_tool(
+        "constructive_pushback",
+        constructive_pushback_tool,
+        f"Given the following context and themes, summarize the most important risks or blindspots (1–2 sentences), then ask a supportive, curiosity-driven question.\n\n<context>\n{json.dumps(context_input, indent=2)}\n</context>\n<themes>\n{json.dumps(themes_list, indent=2)}\n</themes>\n\nUse the `constructive_pushback` tool to respond.\n"
+    )
+
 @app.route('/api/brainstorm/refine/pushback', methods=['POST'])
-def get_pushback():
-    data = request.get_json()
+async def get_pushback():
+    data = await get_request_data('context_input', 'themes')
     context_input = data.get('context_input')
     themes = data.get('themes')
     if not context_input or themes is None:
         return jsonify({"error": "Missing 'context_input' or 'themes' in request body"}), 400
     try:
-        # Accept both list and dict for themes
-        if isinstance(themes, dict):
-            themes_list = themes.get('themes', [])
-        else:
-            themes_list = themes
-        pushback = run_claude_tool(
-            "constructive_pushback",
-            constructive_pushback_tool,
-            f"Given the following context and themes, summarize the most important risks or blindspots (1–2 sentences), then ask a supportive, curiosity-driven question.\n\n<context>\n{json.dumps(context_input, indent=2)}\n</context>\n<themes>\n{json.dumps(themes_list, indent=2)}\n</themes>\n\nUse the `constructive_pushback` tool to respond.\n"
-        )
+        pushback = await compute_pushback(context_input, themes)
+        save_to_session(data, 'pushback', pushback)
         return jsonify({'phase': 'refine', 'step': 'pushback', 'data': pushback})
     except Exception as e:
-        print(f"Error in /refine/pushback: {e}")
+        logger.error(f"Error in /refine/pushback: {e}")
         return jsonify({'phase': 'refine', 'step': 'pushback', 'error': str(e)}), 500
 
+async def compute_core_problem(context_input, clarification):
+    core_problem_result = await run_claude_tool(
+        "summarize_core_problem",
+        core_problem_tool,
+        f"Given the following context and clarification, summarize the core problem, user pain, and constraints in a concise, actionable way. This summary will be used to anchor all downstream idea generation prompts, so make it practical and specific to the user's needs.\n\n<context>\n{json.dumps(context_input, indent=2)}\n</context>\n<clarification>\n{json.dumps(clarification, indent=2)}\n</clarification>\n"
+    )
+    return core_problem_result.get("core_problem", "Core problem could not be summarized.")
+
 @app.route('/api/brainstorm/refine/core_problem', methods=['POST'])
-def get_core_problem():
-    data = request.get_json()
+async def get_core_problem():
+    data = await get_request_data('context_input', 'clarification')
     context_input = data.get('context_input')
     clarification = data.get('clarification')
     if not context_input or not clarification:
         return jsonify({"error": "Missing 'context_input' or 'clarification' in request body"}), 400
     try:
-        core_problem_result = run_claude_tool(
-            "summarize_core_problem",
-            core_problem_tool,
-            f"Given the following context and clarification, summarize the core problem, user pain, and constraints in a concise, actionable way. This summary will be used to anchor all downstream idea generation prompts, so make it practical and specific to the user's needs.\n\n<context>\n{json.dumps(context_input, indent=2)}\n</context>\n<clarification>\n{json.dumps(clarification, indent=2)}\n</clarification>\n"
-        )
-        core_problem = core_problem_result.get("core_problem", "Core problem could not be summarized.")
+        prefetched, core_problem = await prefetcher.take(data.get('session_id'), 'core_problem', (context_input, clarification))
+        if not prefetched:
+            core_problem = await compute_core_problem(context_input, clarification)
+        save_to_session(data, 'core_problem', core_problem)
         return jsonify({'phase': 'refine', 'step': 'core_problem', 'data': core_problem})
     except Exception as e:
-        print(f"Error in /refine/core_problem: {e}")
+        logger.error(f"Error in /refine/core_problem: {e}")
         return jsonify({'phase': 'refine', 'step': 'core_problem', 'error': str(e)}), 500
 
-@app.route('/api/brainstorm/refine/creative_expansion', methods=['POST'])
-def get_creative_expansion():
-    data = request.get_json()
-    core_problem = data.get('core_problem')
-    combined_context = data.get('combined_context') # Frontend needs to construct this
+async def compute_creative_expansion(core_problem, combined_context):
     user_idea = combined_context.get('context', {}).get('user_goal', '') if combined_context else ''
-    if not core_problem or not combined_context:
-         return jsonify({"error": "Missing 'core_problem' or 'combined_context' in request body"}), 400
-    try:
-        creative_expansion = run_claude_tool(
-            "meta_creativity",
-            meta_creativity_tool,
-            f"""
+    return await run_claude_tool(
+        "meta_creativity",
+        meta_creativity_tool,
+        f"""
 You are a meta-creative agent. Expand on the following user idea and core problem, but do NOT stray from the user's context and constraints.
 
 User Idea:
@@ -687,25 +1293,29 @@ For each SCAMPER variation, use structured chain-of-thought reasoning. Output yo
 {json.dumps(combined_context, indent=2)}
 </context>
 """
-        )
-        return jsonify({'phase': 'refine', 'step': 'creative_expansion', 'data': creative_expansion})
-    except Exception as e:
-        print(f"Error in /refine/creative_expansion: {e}")
-        return jsonify({'phase': 'refine', 'step': 'creative_expansion', 'error': str(e)}), 500
+    )
 
-@app.route('/api/brainstorm/refine/cross_analogs', methods=['POST'])
-def get_cross_analogs():
-    data = request.get_json()
+@app.route('/api/brainstorm/refine/creative_expansion', methods=['POST'])
+async def get_creative_expansion():
+    data = await get_request_data('core_problem', 'combined_context')
     core_problem = data.get('core_problem')
     combined_context = data.get('combined_context') # Frontend needs to construct this
-    user_idea = combined_context.get('context', {}).get('user_goal', '') if combined_context else ''
     if not core_problem or not combined_context:
          return jsonify({"error": "Missing 'core_problem' or 'combined_context' in request body"}), 400
     try:
-        cross_analogs = run_claude_tool(
-            "cross_pollination",
-            cross_pollination_tool,
-            f"""
+        creative_expansion = await compute_creative_expansion(core_problem, combined_context)
+        save_to_session(data, 'creative_expansion', creative_expansion)
+        return jsonify({'phase': 'refine', 'step': 'creative_expansion', 'data': creative_expansion})
+    except Exception as e:
+        logger.error(f"Error in /refine/creative_expansion: {e}")
+        return jsonify({'phase': 'refine', 'step': 'creative_expansion', 'error': str(e)}), 500
+
+async def compute_cross_analogs(core_problem, combined_context):
+    user_idea = combined_context.get('context', {}).get('user_goal', '') if combined_context else ''
+    return await run_claude_tool(
+        "cross_pollination",
+        cross_pollination_tool,
+        f"""
 You are an innovation agent. Using the following user idea and core problem, generate practical, actionable, and relevant idea variants by:
 - Drawing analogies from other industries (cross-industry analogies)
 - Proposing hybrid concepts that combine the user's idea with proven solutions from other domains
@@ -731,60 +1341,203 @@ For each hybrid concept, first think: use structured chain-of-thought reasoning.
 {core_problem}
 </core_problem>
 """
-        )
+    )
+
+@app.route('/api/brainstorm/refine/cross_analogs', methods=['POST'])
+async def get_cross_analogs():
+    data = await get_request_data('core_problem', 'combined_context')
+    core_problem = data.get('core_problem')
+    combined_context = data.get('combined_context') # Frontend needs to construct this
+    if not core_problem or not combined_context:
+         return jsonify({"error": "Missing 'core_problem' or 'combined_context' in request body"}), 400
+    try:
+        cross_analogs = await compute_cross_analogs(core_problem, combined_context)
+        save_to_session(data, 'cross_analogs', cross_analogs)
         return jsonify({'phase': 'refine', 'step': 'cross_analogs', 'data': cross_analogs})
     except Exception as e:
-        print(f"Error in /refine/cross_analogs: {e}")
+        logger.error(f"Error in /refine/cross_analogs: {e}")
         return jsonify({'phase': 'refine', 'step': 'cross_analogs', 'error': str(e)}), 500
 
+async def compute_variant_pushback(idea_variant):
+    return await run_claude_tool(
+        "variant_pushback",
+        variant_pushback_tool,
+        f"Given the following idea variant, summarize the most important risks or blindspots (1–2 sentences), then ask a curiosity-driven question (for display only, not for user response).\n\n<idea>\n{idea_variant}\n</idea>\n"
+    )
+
 @app.route('/api/brainstorm/refine/variant_pushback', methods=['POST'])
-def get_variant_pushback():
-    data = request.get_json()
+async def get_variant_pushback():
+    data = await request.get_json()
     idea_variant = data.get('idea_variant')
     if not idea_variant:
         return jsonify({"error": "Missing 'idea_variant' in request body"}), 400
     try:
-        variant_pushback = run_claude_tool(
-            "constructive_pushback",
-            constructive_pushback_tool,
-            f"Given the following idea variant, summarize the most important risks or blindspots (1–2 sentences), then ask a curiosity-driven question (for display only, not for user response).\n\n<idea>\n{idea_variant}\n</idea>\n"
-        )
+        variant_pushback = await compute_variant_pushback(idea_variant)
         return jsonify({'phase': 'refine', 'step': 'variant_pushback', 'data': variant_pushback})
     except Exception as e:
-        print(f"Error in /refine/variant_pushback: {e}")
+        logger.error(f"Error in /refine/variant_pushback: {e}")
         return jsonify({'phase': 'refine', 'step': 'variant_pushback', 'error': str(e)}), 500
 
+async def compute_variant_feasibility(idea_variant, variant_context):
+    return await run_claude_tool(
+        "score_feasibility",
+        feasibility_tool,
+        f"Score the feasibility of the following idea variant.\n\n<context>\n{json.dumps(variant_context, indent=2)}\n</context>\n<idea>\n{idea_variant}\n</idea>\n"
+    )
+
 @app.route('/api/brainstorm/refine/variant_feasibility', methods=['POST'])
-def get_variant_feasibility():
-    data = request.get_json()
+async def get_variant_feasibility():
+    data = await request.get_json()
     idea_variant = data.get('idea_variant')
     variant_context = data.get('variant_context') # Frontend needs to construct this
     if not idea_variant or not variant_context:
         return jsonify({"error": "Missing 'idea_variant' or 'variant_context' in request body"}), 400
     try:
-        variant_feasibility = run_claude_tool(
-            "score_feasibility",
-            feasibility_tool,
-            f"Score the feasibility of the following idea variant.\n\n<context>\n{json.dumps(variant_context, indent=2)}\n</context>\n<idea>\n{idea_variant}\n</idea>\n"
-        )
+        variant_feasibility = await compute_variant_feasibility(idea_variant, variant_context)
         return jsonify({'phase': 'refine', 'step': 'variant_feasibility', 'data': variant_feasibility})
     except Exception as e:
-        print(f"Error in /refine/variant_feasibility: {e}")
+        logger.error(f"Error in /refine/variant_feasibility: {e}")
         return jsonify({'phase': 'refine', 'step': 'variant_feasibility', 'error': str(e)}), 500
 
+# Up to this many variants are scored for feasibility in one call; 1 scores each separately
+FEASIBILITY_BATCH_SIZE = int(os.environ.get("FEASIBILITY_BATCH_SIZE", "6"))
 
-# === Phase 2: Research ===
+async def compute_batch_feasibility(idea_variants, base_context):
+    # Variant ids are 1-based positions in `idea_variants`
+    variants_block = "\n".join(f'<variant id="{i}">\n{idea}\n</variant>' for i, idea in enumerate(idea_variants, 1))
+    result = await run_claude_tool(
+        "score_feasibility_batch",
+        feasibility_batch_tool,
+        f"Score the feasibility of each of the following idea variants independently. Return exactly one entry per variant, with its variant_id.\n\n<context>\n{json.dumps(base_context, indent=2)}\n</context>\n<variants>\n{variants_block}\n</variants>\n"
+    )
+    scores = {}
+    for entry in (result or {}).get("scores", []):
+        entry = dict(entry)
+        variant_id = entry.pop("variant_id", None)
+        if isinstance(variant_id, int) and 1 <= variant_id <= len(idea_variants):
+            scores[variant_id - 1] = entry
+    return scores
+
+async def score_feasibility_chunk(idea_variants, base_context):
+    # Returns {position in chunk: feasibility} for the variants one batch call scored. A failed
+    # call scores none; the caller falls back to the single-variant tool for whatever is missing.
+    try:
+        scores = await compute_batch_feasibility(idea_variants, base_context)
+    except Exception as e:
+        logger.error(f"Batch feasibility scoring failed for {len(idea_variants)} variants, scoring them one by one: {e}")
+        return {}
+    missing = len(idea_variants) - len(scores)
+    if scores and missing:
+        logger.warning(f"Batch feasibility scoring skipped {missing} of {len(idea_variants)} variants; scoring them one by one")
+    return scores
+
+def score_single_feasibility(idea, base_context):
+    return compute_variant_feasibility(idea, dict(base_context, idea_variant=idea))
+
+# Upper bound on simultaneous Claude calls for one batch; requests may ask for less
+VARIANT_EVAL_MAX_CONCURRENCY = int(os.environ.get("VARIANT_EVAL_MAX_CONCURRENCY", "8"))
+# SCAMPER variations and hybrid concepts often restate each other; variants at least this
+# similar (estimated token-set Jaccard) are scored once. 0 disables deduplication.
+VARIANT_DEDUP_THRESHOLD = float(os.environ.get("VARIANT_DEDUP_THRESHOLD", "0.7"))
+
+def dedupe_variants(idea_variants, threshold=VARIANT_DEDUP_THRESHOLD):
+    # Returns [(representative, [aliases])] with representatives in their original order
+    if not threshold or len(idea_variants) < 2:
+        return [(idea, []) for idea in idea_variants]
+    texts = [idea if isinstance(idea, str) else json.dumps(idea) for idea in idea_variants]
+    clusters = cluster_near_duplicates(texts, threshold)
+    if len(clusters) < len(idea_variants):
+        logger.info(f"Deduplicated {len(idea_variants)} idea variants into {len(clusters)}")
+    return [(idea_variants[cluster[0]], [idea_variants[i] for i in cluster[1:]]) for cluster in clusters]
+
+async def evaluate_variants(idea_variants, base_context, max_concurrency=VARIANT_EVAL_MAX_CONCURRENCY, dedup_threshold=VARIANT_DEDUP_THRESHOLD,
+                            batch_size=FEASIBILITY_BATCH_SIZE):
+    # Pushback and feasibility are independent, so every call for every variant runs at once.
+    # Feasibility is scored `batch_size` variants per call, sharing one copy of the context.
+    # A failing call only blanks its own field instead of failing the whole batch.
+    # Near-duplicates are only scored through their representative and listed as its aliases.
+    deduped = dedupe_variants(idea_variants, dedup_threshold)
+    idea_variants = [idea for idea, _ in deduped]
+
+    async def attempt(call):
+        kind, idx, fn = call
+        try:
+            return await fn(), None
+        except Exception as e:
+            logger.error(f"Error evaluating {kind} {idx + 1}: {e}")
+            return None, str(e)
+
+    calls = [("pushback", idx, lambda idea=idea: compute_variant_pushback(idea)) for idx, idea in enumerate(idea_variants)]
+    chunks = [(start, idea_variants[start:start + batch_size]) for start in range(0, len(idea_variants), max(1, batch_size))]
+    for start, chunk in chunks:
+        if len(chunk) > 1:
+            calls.append(("feasibility batch", start // batch_size, lambda chunk=chunk: score_feasibility_chunk(chunk, base_context)))
+        else:
+            calls.append(("feasibility", start, lambda idea=chunk[0]: score_single_feasibility(idea, base_context)))
+    limit = min(max_concurrency, VARIANT_EVAL_MAX_CONCURRENCY)
+    with priority(BULK):
+        outputs = await gather_bounded(attempt, calls, limit)
+    pushbacks = outputs[:len(idea_variants)]
+    feasibilities = [None] * len(idea_variants)
+    for (start, chunk), (scored, error) in zip(chunks, outputs[len(idea_variants):]):
+        if len(chunk) > 1:
+            for offset, feasibility in (scored or {}).items():
+                feasibilities[start + offset] = (feasibility, None)
+        else:
+            feasibilities[start] = (scored, error)
+
+    # Variants a batch call failed or skipped are scored one by one, under the same concurrency cap
+    missing = [idx for idx, outcome in enumerate(feasibilities) if outcome is None]
+    if missing:
+        with priority(BULK):
+            fallbacks = await gather_bounded(
+                attempt, [("feasibility", idx, lambda idea=idea_variants[idx]: score_single_feasibility(idea, base_context)) for idx in missing], limit
+            )
+        for idx, outcome in zip(missing, fallbacks):
+            feasibilities[idx] = outcome
+
+    variant_results = []
+    for idx, idea in enumerate(idea_variants):
+        (pushback, pushback_error), (feasibility, feasibility_error) = pushbacks[idx], feasibilities[idx]
+        result = {"idea": idea, "pushback": pushback, "feasibility": feasibility}
+        if deduped[idx][1]:
+            result["aliases"] = deduped[idx][1]
+        errors = {kind: error for kind, error in (("pushback", pushback_error), ("feasibility", feasibility_error)) if error}
+        if errors:
+            result["errors"] = errors
+        variant_results.append(result)
+    return variant_results
+
+@app.route('/api/brainstorm/refine/variants/evaluate', methods=['POST'])
+async def evaluate_all_variants():
+    data = await get_request_data()
+    idea_variants = data.get('all_idea_variants')
+    variant_context = data.get('variant_context') # Shared context; each variant is added as 'idea_variant'
+    if not idea_variants or not isinstance(idea_variants, list) or not variant_context:
+        return jsonify({"error": "Missing 'all_idea_variants' (list) or 'variant_context' in request body"}), 400
+    max_concurrency = data.get('max_concurrency', VARIANT_EVAL_MAX_CONCURRENCY)
+    if not isinstance(max_concurrency, int) or max_concurrency < 1:
+        return jsonify({"error": "'max_concurrency' must be a positive integer"}), 400
+    dedup_threshold = data.get('dedup_threshold', VARIANT_DEDUP_THRESHOLD)
+    if not isinstance(dedup_threshold, (int, float)) or not 0 <= dedup_threshold <= 1:
+        return jsonify({"error": "'dedup_threshold' must be a number between 0 and 1 (0 disables deduplication)"}), 400
+    batch_size = data.get('feasibility_batch_size', FEASIBILITY_BATCH_SIZE)
+    if not isinstance(batch_size, int) or batch_size < 1:
+        return jsonify({"error": "'feasibility_batch_size' must be a positive integer"}), 400
+    try:
+        variant_results = await evaluate_variants(idea_variants, variant_context, max_concurrency, dedup_threshold, batch_size)
+        save_to_session(data, 'variant_results', variant_results)
+        prefetch_after(data, 'variant_results')
+        return jsonify({'phase': 'refine', 'step': 'variants_evaluate', 'data': variant_results})
+    except Exception as e:
+        logger.error(f"Error in /refine/variants/evaluate: {e}")
+        return jsonify({'phase': 'refine', 'step': 'variants_evaluate', 'error': str(e)}), 500
 
-@app.route('/api/brainstorm/research/summary', methods=['POST'])
-def summarize_research():
-    data = request.get_json()
-    research_results = data.get('research_results')
-    selected_idea = data.get('selected_idea')
-    if not research_results or not selected_idea:
-        return jsonify({"error": "Missing 'research_results' or 'selected_idea' in request body"}), 400
 
-    try:
-        prompt = f"""
+# === Phase 2: Research ===
+
+async def compute_research_summary(research_results, selected_idea):
+    prompt = f"""
 You are an expert research summarizer. Your task is to create a comprehensive, information-rich summary for debate agents based on the following research agent findings. The summary should be clear and should mention at the very least the 5 most important points. Return the summary through tool use. 
 
 <research_results>
@@ -794,27 +1547,67 @@ You are an expert research summarizer. Your task is to create a comprehensive, i
 {selected_idea}
 </idea>
 """
-        summary_result = run_claude_tool(
-            "summarize_research_context",
-            research_summary_tool,
-            prompt
-        )
-        print(f"Research summary result: {summary_result}")
+    return await run_claude_tool(
+        "summarize_research_context",
+        research_summary_tool,
+        prompt
+    )
+
+@app.route('/api/brainstorm/research/summary', methods=['POST'])
+async def summarize_research():
+    data = await get_request_data('research_results', 'selected_idea')
+    research_results = data.get('research_results')
+    selected_idea = data.get('selected_idea')
+    if not research_results or not selected_idea:
+        return jsonify({"error": "Missing 'research_results' or 'selected_idea' in request body"}), 400
+
+    try:
+        summary_result = await compute_research_summary(research_results, selected_idea)
+        logger.debug(f"Research summary result: {summary_result}")
+        save_to_session(data, 'research_summary', (summary_result or {}).get('research_summary'))
         return jsonify({'phase': 'research', 'step': 'summary', 'data': summary_result})
     except Exception as e:
-        print(f"Error in /research/summary: {e}")
+        logger.error(f"Error in /research/summary: {e}")
         return jsonify({'phase': 'research', 'step': 'summary', 'error': str(e)}), 500
 
 
 # === Phase 3: Debate ===
 
 @app.route('/api/brainstorm/debate/available_roles', methods=['GET'])
-def get_available_debate_roles():
+async def get_available_debate_roles():
     return jsonify({'phase': 'debate', 'step': 'available_roles', 'data': AGENT_ROLES})
 
+debate_shared_prompt = templates.add_prompt("debate_shared", """Debate the following idea:
+<idea>\n{{selected_idea}}\n</idea>
+<research_summary>\n{{research_summary}}\n</research_summary>
+
+At the start of each round, review all critiques and new evidence. Use structured chain-of-thought reasoning: output your step-by-step thinking in <thinking> tags and your final position in <answer> tags. If your vote or weight does not change, you must justify why. If you do change, explain what specifically caused the change. Only assign a high empirical weight if you cite concrete data, studies, or real-world examples; otherwise, use a lower weight. Do not default to 7 or 0.8—your score should reflect your true, updated position. Output a short 'change_log' describing any change in your vote/weight and why it happened (or why it did not). Output your full chain of thought as 'chain_of_thought'. Use the `agent_debate_round` tool.
+""", tools=["agent_debate_round"])
+
+async def compute_debate_turn(selected_idea, research_summary, agent_role, other_feedback, round_num):
+    # Idea, research summary and the debate rules are shared by every role and round, so
+    # they form a cached system prefix; the role, feedback and round number follow.
+    shared_prompt = debate_shared_prompt.render(selected_idea=selected_idea, research_summary=research_summary)
+    debate_prompt = f"""{AGENT_PROMPTS[agent_role]}
+
+Here is anonymized feedback from other agents in this round (if any):
+{json.dumps(other_feedback, indent=2)}
+
+This is Round {round_num}.
+"""
+    round_result = await run_claude_tool(
+        "agent_debate_round",
+        agent_debate_tool,
+        debate_prompt,
+        system=[cached_text_block(shared_prompt)]
+    )
+    if 'agent_name' not in round_result:
+         round_result['agent_name'] = agent_role
+    return round_result
+
 @app.route('/api/brainstorm/debate/round', methods=['POST'])
-def run_debate_round():
-    data = request.get_json()
+async def run_debate_round():
+    data = await get_request_data('selected_idea', 'research_summary')
     selected_idea = data.get('selected_idea')
     research_summary = data.get('research_summary')
     agent_role = data.get('agent_role')
@@ -827,38 +1620,107 @@ def run_debate_round():
         return jsonify({"error": f"Invalid agent_role: {agent_role}. Must be one of {AGENT_ROLES}"}), 400
 
     try:
-        debate_prompt = f"""{AGENT_PROMPTS[agent_role]}
-\nDebate the following idea:
-<idea>\n{selected_idea}\n</idea>
-<research_summary>\n{research_summary}\n</research_summary>
-Here is anonymized feedback from other agents in this round (if any):
-{json.dumps(other_feedback, indent=2)}
-
-This is Round {round_num}. At the start of this round, review all critiques and new evidence. Use structured chain-of-thought reasoning: output your step-by-step thinking in <thinking> tags and your final position in <answer> tags. If your vote or weight does not change, you must justify why. If you do change, explain what specifically caused the change. Only assign a high empirical weight if you cite concrete data, studies, or real-world examples; otherwise, use a lower weight. Do not default to 7 or 0.8—your score should reflect your true, updated position. Output a short 'change_log' describing any change in your vote/weight and why it happened (or why it did not). Output your full chain of thought as 'chain_of_thought'. Use the `agent_debate_round` tool.
-"""
-        round_result = run_claude_tool(
-            "agent_debate_round",
-            agent_debate_tool,
-            debate_prompt
-        )
-        if 'agent_name' not in round_result:
-             round_result['agent_name'] = agent_role
-
+        round_result = await compute_debate_turn(selected_idea, research_summary, agent_role, other_feedback, round_num)
+        update_session_stage(data, 'debate_results', lambda states: {**(states or {}), agent_role: round_result})
+        update_session_stage(data, 'debate_log', lambda log: (log or []) + [{'round': round_num, 'agent_role': agent_role, 'data': round_result}])
         return jsonify({'phase': 'debate', 'step': 'agent_turn', 'round': round_num, 'agent_role': agent_role, 'data': round_result})
     except Exception as e:
-        print(f"Error in /debate/round for agent {agent_role}, round {round_num}: {e}")
+        logger.error(f"Error in /debate/round for agent {agent_role}, round {round_num}: {e}")
         return jsonify({'phase': 'debate', 'step': 'agent_turn', 'round': round_num, 'agent_role': agent_role, 'error': str(e)}), 500
 
-@app.route('/api/brainstorm/debate/summarize', methods=['POST'])
-def summarize_debate_log():
-    data = request.get_json()
-    debate_log = data.get('debate_log')
-    selected_idea = data.get('selected_idea', 'the discussed idea')
-    if not debate_log:
-        return jsonify({"error": "Missing 'debate_log' in request body"}), 400
+DEBATE_MAX_CONCURRENCY = int(os.environ.get("DEBATE_MAX_CONCURRENCY", "8"))
+# Adaptive debates treat num_rounds as a maximum and stop once the votes have settled
+DEBATE_ADAPTIVE = os.environ.get("DEBATE_ADAPTIVE", "0") == "1"
+DEBATE_MAX_VOTE_DELTA = float(os.environ.get("DEBATE_MAX_VOTE_DELTA", "0.5"))
+DEBATE_CONSENSUS_VARIANCE = float(os.environ.get("DEBATE_CONSENSUS_VARIANCE", "0.1"))
+
+async def run_debate_rounds(selected_idea, research_summary, num_rounds, agent_roles=AGENT_ROLES, max_concurrency=DEBATE_MAX_CONCURRENCY, convergence=None):
+    # Each role only reads the previous round's states, so a whole round runs at once.
+    # agent_states is only updated after every turn in the round has finished (the barrier).
+    # With a DebateConvergence, the debate ends early once it reports a reason to stop.
+    agent_states = {role: {} for role in agent_roles}
+    debate_log = []
+    errors = {}
+    stop = {'reason': 'max_rounds', 'rounds_run': 0}
+    for round_num in range(1, num_rounds + 1):
+        async def take_turn(agent_role):
+            other_feedback = [
+                state.get("insight", "[No insight provided]")
+                for other_role, state in agent_states.items()
+                if other_role != agent_role and state
+            ]
+            try:
+                return await compute_debate_turn(selected_idea, research_summary, agent_role, other_feedback, round_num), None
+            except Exception as e:
+                logger.error(f"Error in debate round {round_num} for agent {agent_role}: {e}")
+                return None, str(e)
+
+        with priority(BULK):
+            round_outputs = await gather_bounded(take_turn, agent_roles, min(max_concurrency, DEBATE_MAX_CONCURRENCY))
+        previous_states = dict(agent_states)
+        for agent_role, (output, error) in zip(agent_roles, round_outputs):
+            if error:
+                # A failed turn keeps the role's previous state for the next round
+                errors.setdefault(round_num, {})[agent_role] = error
+                continue
+            agent_states[agent_role] = output
+            debate_log.append({'round': round_num, 'agent_role': agent_role, 'data': output})
+        stop['rounds_run'] = round_num
+        if convergence is not None:
+            reason = convergence.observe(round_num, previous_states, agent_states, complete=round_num not in errors)
+            if reason:
+                logger.info(f"Debate stopped after round {round_num} of {num_rounds}: {reason}")
+                stop['reason'] = reason
+                break
+    if convergence is not None:
+        stop['rounds'] = convergence.rounds
+    return agent_states, debate_log, errors, stop
+
+def debate_convergence(options):
+    # None unless adaptive mode is on for this request (or by default via DEBATE_ADAPTIVE)
+    if not options.get('adaptive', DEBATE_ADAPTIVE):
+        return None
+    return DebateConvergence(
+        max_vote_delta=float(options.get('max_vote_delta', DEBATE_MAX_VOTE_DELTA)),
+        consensus_variance=float(options.get('consensus_variance', DEBATE_CONSENSUS_VARIANCE)),
+    )
+
+@app.route('/api/brainstorm/debate/run', methods=['POST'])
+async def run_debate():
+    data = await get_request_data('selected_idea', 'research_summary')
+    selected_idea = data.get('selected_idea')
+    research_summary = data.get('research_summary')
+    num_rounds = data.get('num_rounds', 3)
+    agent_roles = data.get('agent_roles') or AGENT_ROLES
+    max_concurrency = data.get('max_concurrency', DEBATE_MAX_CONCURRENCY)
+
+    if not selected_idea or not research_summary:
+        return jsonify({"error": "Missing 'selected_idea' or 'research_summary' in request body"}), 400
+    if not isinstance(num_rounds, int) or num_rounds < 1:
+        return jsonify({"error": "'num_rounds' must be a positive integer"}), 400
+    invalid_roles = [role for role in agent_roles if role not in AGENT_ROLES]
+    if invalid_roles:
+        return jsonify({"error": f"Invalid agent_roles: {invalid_roles}. Must be among {AGENT_ROLES}"}), 400
+    if not isinstance(max_concurrency, int) or max_concurrency < 1:
+        return jsonify({"error": "'max_concurrency' must be a positive integer"}), 400
+
+    try:
+        convergence = debate_convergence(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "'max_vote_delta' and 'consensus_variance' must be numbers"}), 400
 
     try:
-        prompt = f"""Summarize the following multi-agent debate log regarding the idea: '{selected_idea}'.
+        agent_states, debate_log, errors, stop = await run_debate_rounds(selected_idea, research_summary, num_rounds, agent_roles, max_concurrency, convergence)
+        save_to_session(data, 'debate_results', agent_states)
+        save_to_session(data, 'debate_log', debate_log)
+        prefetch_after(data, 'debate_results')
+        return jsonify({'phase': 'debate', 'step': 'run', 'data': {'agent_states': agent_states, 'debate_log': debate_log, 'stop': stop}, 'errors': errors})
+    except Exception as e:
+        logger.error(f"Error in /debate/run: {e}")
+        return jsonify({'phase': 'debate', 'step': 'run', 'error': str(e)}), 500
+
+async def compute_debate_summary(debate_log, selected_idea):
+    prompt = f"""Summarize the following multi-agent debate log regarding the idea: '{selected_idea}'.
 Focus on the key arguments presented by each agent role, significant critiques, areas of agreement and disagreement, and the overall evolution of the discussion. Conclude with the final consensus or unresolved tensions. The summary should be comprehensive enough for a final report.
 
 <debate_log>
@@ -867,11 +1729,22 @@ Focus on the key arguments presented by each agent role, significant critiques,
 
 Use the `summarize_debate` tool to output the summary.
 """
-        summary_result = run_claude_tool(
-            "summarize_debate",
-            summarize_debate_tool,
-            prompt
-        )
+    return await run_claude_tool(
+        "summarize_debate",
+        summarize_debate_tool,
+        prompt
+    )
+
+@app.route('/api/brainstorm/debate/summarize', methods=['POST'])
+async def summarize_debate_log():
+    data = await get_request_data('debate_log', 'selected_idea')
+    debate_log = data.get('debate_log')
+    selected_idea = data.get('selected_idea', 'the discussed idea')
+    if not debate_log:
+        return jsonify({"error": "Missing 'debate_log' in request body"}), 400
+
+    try:
+        summary_result = await compute_debate_summary(debate_log, selected_idea)
 
         if not summary_result or not summary_result.get("debate_summary"):
             summary_content = "Error: Debate summary generation failed."
@@ -879,57 +1752,58 @@ Use the `summarize_debate` tool to output the summary.
         else:
             summary_content = summary_result.get('debate_summary')
 
+        save_to_session(data, 'debate_summary', summary_content)
         return jsonify({'phase': 'debate', 'step': 'summary', 'data': summary_content})
 
     except Exception as e:
         error_message = f"Error summarizing debate: {e}"
-        print(error_message)
+        logger.error(error_message)
         return jsonify({'phase': 'debate', 'step': 'summary', 'error': error_message}), 500
 
 
 # === Phase 4: Feature Ideation ===
-@app.route('/api/brainstorm/feature_ideation', methods=['POST'])
-def get_feature_ideation():
-    data = request.get_json()
-    combined_context = data.get('combined_context')
-    debate_results = data.get('debate_results')
-    if not combined_context or not debate_results:
-        return jsonify({"error": "Missing 'combined_context' or 'debate_results' in request body"}), 400
-
-    try:
-        prompt = f"""You are a Feature Ideation Agent. Given all previous context, debate results, and user feedback, generate:
+feature_ideation_prompt = templates.add_prompt("feature_ideation", """You are a Feature Ideation Agent. Given all previous context, debate results, and user feedback, generate:
 - Must-have vs nice-to-have features
 - Feasibility & technical complexity
 - Rough cost & time estimates
 - Suggested feature pivots based on user feedback and debate
 
-<context>\n{json.dumps(combined_context, indent=2)}\n</context>
-<debate_results>\n{json.dumps(debate_results, indent=2)}\n</debate_results>
+<context>\n{{context}}\n</context>
+<debate_results>\n{{debate_results}}\n</debate_results>
 
 Use the `feature_ideation` tool.
-"""
-        feature_result = run_claude_tool(
-            "feature_ideation",
-            feature_ideation_tool,
-            prompt
-        )
-        return jsonify({'phase': 'feature_ideation', 'step': 'result', 'data': feature_result})
-    except Exception as e:
-        print(f"Error in /feature_ideation: {e}")
-        return jsonify({'phase': 'feature_ideation', 'step': 'result', 'error': str(e)}), 500
+""")
+
+async def compute_feature_ideation(combined_context, debate_results):
+    sections = await compact_context("feature_ideation", {"context": combined_context, "debate_results": debate_results})
+    prompt = feature_ideation_prompt.render(**sections)
+    return await run_claude_tool(
+        "feature_ideation",
+        feature_ideation_tool,
+        prompt
+    )
 
-# === Phase 5: Competitive Analysis ===
-@app.route('/api/brainstorm/competitive_analysis', methods=['POST'])
-def get_competitive_analysis():
-    data = request.get_json()
+@app.route('/api/brainstorm/feature_ideation', methods=['POST'])
+async def get_feature_ideation():
+    data = await get_request_data('combined_context', 'debate_results')
     combined_context = data.get('combined_context')
     debate_results = data.get('debate_results')
-    feature_ideation = data.get('feature_ideation')
-    if not combined_context or not debate_results or not feature_ideation:
-        return jsonify({"error": "Missing 'combined_context', 'debate_results', or 'feature_ideation' in request body"}), 400
+    if not combined_context or not debate_results:
+        return jsonify({"error": "Missing 'combined_context' or 'debate_results' in request body"}), 400
 
     try:
-        prompt = f"""You are a Competitive Intelligence Agent. Given all previous context, debate results, and feature ideation, map:
+        prefetched, feature_result = await prefetcher.take(data.get('session_id'), 'feature_ideation', (combined_context, debate_results))
+        if not prefetched:
+            feature_result = await compute_feature_ideation(combined_context, debate_results)
+        save_to_session(data, 'feature_ideation', feature_result)
+        prefetch_after(data, 'feature_ideation')
+        return jsonify({'phase': 'feature_ideation', 'step': 'result', 'data': feature_result})
+    except Exception as e:
+        logger.error(f"Error in /feature_ideation: {e}")
+        return jsonify({'phase': 'feature_ideation', 'step': 'result', 'error': str(e)}), 500
+
+# === Phase 5: Competitive Analysis ===
+competitive_intelligence_prompt = templates.add_prompt("competitive_intelligence", """You are a Competitive Intelligence Agent. Given all previous context, debate results, and feature ideation, map:
 - 3-6 direct and indirect competitors
 - 3-6 Blue Ocean gaps
 - 3-6 SWOT profiles
@@ -937,36 +1811,44 @@ def get_competitive_analysis():
 
 Be concise and to the point. Do not include patent overlaps. Only include the most relevant examples for each category.
 
-<context>\n{json.dumps(combined_context, indent=2)}\n</context>
-<debate_results>\n{json.dumps(debate_results, indent=2)}\n</debate_results>
-<feature_ideation>\n{json.dumps(feature_ideation, indent=2)}\n</feature_ideation>
+<context>\n{{context}}\n</context>
+<debate_results>\n{{debate_results}}\n</debate_results>
+<feature_ideation>\n{{feature_ideation}}\n</feature_ideation>
 
 Use the `competitive_intelligence` tool.
-"""
-        analysis_result = run_claude_tool(
-            "competitive_intelligence",
-            competitive_intel_tool,
-            prompt
-        )
-        return jsonify({'phase': 'competitive_analysis', 'step': 'result', 'data': analysis_result})
-    except Exception as e:
-        print(f"Error in /competitive_analysis: {e}")
-        return jsonify({'phase': 'competitive_analysis', 'step': 'result', 'error': str(e)}), 500
+""")
+
+async def compute_competitive_analysis(combined_context, debate_results, feature_ideation):
+    sections = await compact_context("competitive_intelligence", {"context": combined_context, "debate_results": debate_results, "feature_ideation": feature_ideation})
+    prompt = competitive_intelligence_prompt.render(**sections)
+    return await run_claude_tool(
+        "competitive_intelligence",
+        competitive_intel_tool,
+        prompt
+    )
 
-# === Phase 6: MVP Roadmap ===
-@app.route('/api/brainstorm/mvp_roadmap', methods=['POST'])
-def get_mvp_roadmap():
-    data = request.get_json()
+@app.route('/api/brainstorm/competitive_analysis', methods=['POST'])
+async def get_competitive_analysis():
+    data = await get_request_data('combined_context', 'debate_results', 'feature_ideation')
     combined_context = data.get('combined_context')
     debate_results = data.get('debate_results')
     feature_ideation = data.get('feature_ideation')
-    competitive_analysis = data.get('competitive_analysis')
-    if not combined_context or not debate_results or not feature_ideation or not competitive_analysis:
-        return jsonify({"error": "Missing 'combined_context', 'debate_results', 'feature_ideation', or 'competitive_analysis' in request body"}), 400
+    if not combined_context or not debate_results or not feature_ideation:
+        return jsonify({"error": "Missing 'combined_context', 'debate_results', or 'feature_ideation' in request body"}), 400
 
     try:
-        # Updated prompt to emphasize conciseness and realism for MVP
-        prompt = f"""You are a Roadmap & Action Plan Agent. Given all previous context, debate results, feature ideation, and competitive analysis, produce:
+        prefetched, analysis_result = await prefetcher.take(data.get('session_id'), 'competitive_analysis', (combined_context, debate_results, feature_ideation))
+        if not prefetched:
+            analysis_result = await compute_competitive_analysis(combined_context, debate_results, feature_ideation)
+        save_to_session(data, 'competitive_analysis', analysis_result)
+        prefetch_after(data, 'competitive_analysis')
+        return jsonify({'phase': 'competitive_analysis', 'step': 'result', 'data': analysis_result})
+    except Exception as e:
+        logger.error(f"Error in /competitive_analysis: {e}")
+        return jsonify({'phase': 'competitive_analysis', 'step': 'result', 'error': str(e)}), 500
+
+# === Phase 6: MVP Roadmap ===
+mvp_roadmap_prompt = templates.add_prompt("mvp_roadmap", """You are a Roadmap & Action Plan Agent. Given all previous context, debate results, feature ideation, and competitive analysis, produce:
 - **MVP Architecture Overview:** Keep this high-level, focusing on core components.
 - **Implementation Plan:** Outline key milestones, essential toolkits/tech, and realistic hiring needs for an *initial* MVP. Avoid overly detailed long-term plans.
 - **Technical Validation:** Briefly confirm the core technical feasibility.
@@ -974,49 +1856,93 @@ def get_mvp_roadmap():
 
 **Focus on a *Minimum* Viable Product.** Keep the architecture and plan concise and grounded. Provide realistic, high-level estimates suitable for an initial MVP launch, avoiding excessively large figures unless strongly justified by the input context.
 
-<context>\n{json.dumps(combined_context, indent=2)}\n</context>
-<debate_results>\n{json.dumps(debate_results, indent=2)}\n</debate_results>
-<feature_ideation>\n{json.dumps(feature_ideation, indent=2)}\n</feature_ideation>
-<competitive_analysis>\n{json.dumps(competitive_analysis, indent=2)}\n</competitive_analysis>
+<context>\n{{context}}\n</context>
+<debate_results>\n{{debate_results}}\n</debate_results>
+<feature_ideation>\n{{feature_ideation}}\n</feature_ideation>
+<competitive_analysis>\n{{competitive_analysis}}\n</competitive_analysis>
 
 Use the `mvp_roadmap` tool.
-"""
-        roadmap_result = run_claude_tool(
-            "mvp_roadmap",
-            roadmap_tool,
-            prompt
-        )
+""")
+
+async def compute_mvp_roadmap(combined_context, debate_results, feature_ideation, competitive_analysis):
+    sections = await compact_context("mvp_roadmap", {
+        "context": combined_context,
+        "debate_results": debate_results,
+        "feature_ideation": feature_ideation,
+        "competitive_analysis": competitive_analysis
+    })
+    # Updated prompt to emphasize conciseness and realism for MVP
+    prompt = mvp_roadmap_prompt.render(**sections)
+    return await run_claude_tool(
+        "mvp_roadmap",
+        roadmap_tool,
+        prompt
+    )
+
+@app.route('/api/brainstorm/mvp_roadmap', methods=['POST'])
+async def get_mvp_roadmap():
+    data = await get_request_data('combined_context', 'debate_results', 'feature_ideation', 'competitive_analysis')
+    combined_context = data.get('combined_context')
+    debate_results = data.get('debate_results')
+    feature_ideation = data.get('feature_ideation')
+    competitive_analysis = data.get('competitive_analysis')
+    if not combined_context or not debate_results or not feature_ideation or not competitive_analysis:
+        return jsonify({"error": "Missing 'combined_context', 'debate_results', 'feature_ideation', or 'competitive_analysis' in request body"}), 400
+
+    try:
+        prefetched, roadmap_result = await prefetcher.take(data.get('session_id'), 'mvp_roadmap', (combined_context, debate_results, feature_ideation, competitive_analysis))
+        if not prefetched:
+            roadmap_result = await compute_mvp_roadmap(combined_context, debate_results, feature_ideation, competitive_analysis)
+        save_to_session(data, 'mvp_roadmap', roadmap_result)
         return jsonify({'phase': 'mvp_roadmap', 'step': 'result', 'data': roadmap_result})
     except Exception as e:
-        print(f"Error in /mvp_roadmap: {e}")
+        logger.error(f"Error in /mvp_roadmap: {e}")
         return jsonify({'phase': 'mvp_roadmap', 'step': 'result', 'error': str(e)}), 500
 
 
-# === Phase 7: Report Generation ===
+# === Speculative Prefetch ===
+
+async def prefetch_research_round(selected_idea, combined_context):
+    # Only the first round: it goes to the response cache, where /research/run and
+    # /research/round pick it up if the user goes with the same idea
+    round_outputs, _ = await run_research_round(selected_idea, combined_context, DEFAULT_RESEARCH_AGENTS, 1)
+    return round_outputs
+
+def top_variant_idea(stages):
+    variant_results = stages.get('variant_results') or []
+    if not variant_results:
+        return None
+    return max(variant_results, key=lambda v: feasibility_score(v.get('feasibility')))['idea']
+
+# Next stage -> (the stage whose endpoint triggers it, its inputs from the session's stages,
+# compute). Inputs are the same values the next endpoint reads, so a prefetch only matches
+# if the user didn't change anything in between.
+PREFETCHES = {
+    'core_problem': ('clarification', lambda s: (s.get('context_input'), s.get('clarification')), compute_core_problem),
+    'research': ('variant_results', lambda s: (top_variant_idea(s), s.get('combined_context')), prefetch_research_round),
+    'feature_ideation': ('debate_results', lambda s: (s.get('combined_context'), s.get('debate_results')), compute_feature_ideation),
+    'competitive_analysis': ('feature_ideation', lambda s: (s.get('combined_context'), s.get('debate_results'), s.get('feature_ideation')),
+                             compute_competitive_analysis),
+    'mvp_roadmap': ('competitive_analysis', lambda s: (s.get('combined_context'), s.get('debate_results'), s.get('feature_ideation'), s.get('competitive_analysis')),
+                    compute_mvp_roadmap),
+}
 
-# New endpoint for generating the full report
-@app.route('/api/brainstorm/report/generate_full', methods=['POST'])
-def generate_full_report():
-    data = request.get_json()
-    combined_context = data.get('combined_context') # Expect full context
+def prefetch_after(data, stage):
+    # Called by an endpoint once it has saved `stage`; starts whatever usually comes next
+    session_id = data.get('session_id')
+    if not prefetcher.enabled(session_id):
+        return
+    stages = session_store.get_stages(session_id)
+    for next_stage, (trigger, inputs_of, compute) in PREFETCHES.items():
+        inputs = inputs_of(stages)
+        if trigger == stage and all(inputs):
+            prefetcher.start(session_id, next_stage, inputs, compute)
 
-    if not combined_context:
-        return jsonify({"error": "Missing 'combined_context' in request body"}), 400
 
-    # Construct a comprehensive context string for the prompt
-    report_context_str = f"""
-Selected Idea/Core Problem: {combined_context.get('core_problem', 'N/A')}
-Initial Context & Refinement: {json.dumps(combined_context.get('context', {}), indent=2)}
-Research Summary: {json.dumps(combined_context.get('research_summary', {}), indent=2)}
-Debate Summary/Log: {json.dumps(combined_context.get('debate_log', []), indent=2)}
-Feature Ideation: {json.dumps(combined_context.get('feature_ideation', {}), indent=2)}
-Competitive Analysis: {json.dumps(combined_context.get('competitive_analysis', {}), indent=2)}
-MVP Roadmap: {json.dumps(combined_context.get('mvp_roadmap', {}), indent=2)}
-"""
+# === Phase 7: Report Generation ===
 
-    try:
-        # Updated prompt with explicit detail, section requirements, emoji request, MVP simplification, table request, and TL;DRs
-        prompt = f"""
+# Explicit detail, section requirements, emojis, MVP simplification, tables and TL;DRs
+full_report_prompt = templates.add_prompt("generate_full_report", """
 Generate an extremely detailed, engaging, and highly readable final brainstorm report. Your goal is to synthesize all provided information into a cohesive, actionable, and visually appealing document. Be insightful, draw deep connections between the different phases (refinement, research, debate, features, market, roadmap).
 
 ## 📐 Formatting & Readability Requirements
@@ -1179,38 +2105,621 @@ After team discussion, we agreed to validate with a prototype.
 ```
 
 <report_context>
-{report_context_str}
+{{report_context}}
 </report_context>
 
 Use the `generate_full_report` tool to output the complete report content in the 'full_report_content' field.
+""")
+
+async def build_full_report_prompt(combined_context):
+    sections = await compact_context("generate_full_report", {
+        "core_problem": combined_context.get('core_problem') or 'N/A',
+        "context": combined_context.get('context', {}),
+        "research_summary": combined_context.get('research_summary', {}),
+        "debate_log": combined_context.get('debate_log', []),
+        "feature_ideation": combined_context.get('feature_ideation', {}),
+        "competitive_analysis": combined_context.get('competitive_analysis', {}),
+        "mvp_roadmap": combined_context.get('mvp_roadmap', {})
+    })
+    # Construct a comprehensive context string for the prompt
+    report_context_str = f"""
+Selected Idea/Core Problem: {sections['core_problem']}
+Initial Context & Refinement: {sections['context']}
+Research Summary: {sections['research_summary']}
+Debate Summary/Log: {sections['debate_log']}
+Feature Ideation: {sections['feature_ideation']}
+Competitive Analysis: {sections['competitive_analysis']}
+MVP Roadmap: {sections['mvp_roadmap']}
 """
-        report_result = run_claude_tool(
-            "generate_full_report",
-            full_report_tool, # Use the new tool schema
-            prompt
-        )
+
+    return full_report_prompt.render(report_context=report_context_str)
+
+async def compute_full_report(combined_context):
+    return await run_claude_tool(
+        "generate_full_report",
+        full_report_tool, # Use the new tool schema
+        await build_full_report_prompt(combined_context)
+    )
+
+# "full" asks one call for the whole report; "sections" writes each section concurrently
+# from only the context it needs and closes with a short conclusion pass
+REPORT_MODE = os.environ.get("REPORT_MODE", "full")
+REPORT_MODES = ("full", "sections")
+REPORT_SECTION_MAX_CONCURRENCY = int(os.environ.get("REPORT_SECTION_MAX_CONCURRENCY", "7"))
+
+# Order, heading and the combined_context fields each section is written from
+REPORT_SECTIONS = [
+    {"key": "executive_summary", "title": "🚀 Executive Summary",
+     "inputs": ("core_problem", "context", "research_summary", "feature_ideation", "mvp_roadmap"),
+     "focus": "The problem, the proposed solution, the key insights and the MVP in a few bullets. Stakeholders read only this section."},
+    {"key": "problem", "title": "🔍 Problem Definition & Refinement",
+     "inputs": ("core_problem", "context"),
+     "focus": "How the original idea was refined into the core problem, with a final problem statement callout and the constraints."},
+    {"key": "research", "title": "📊 Research Insights",
+     "inputs": ("core_problem", "research_summary"),
+     "focus": "User, market, competitive and contrarian findings, with the strongest evidence called out."},
+    {"key": "debate", "title": "🤔 Debate Perspectives",
+     "inputs": ("core_problem", "debate_log"),
+     "focus": "Each agent's position and how it shifted, in a position/argument table, plus where the debate settled."},
+    {"key": "features", "title": "⚙️ Feature Ideation & Prioritization",
+     "inputs": ("core_problem", "feature_ideation"),
+     "focus": "Must-have vs nice-to-have features in a markdown table with feasibility notes and cost/time estimates."},
+    {"key": "market", "title": "🧩 Competitive & Gap Analysis",
+     "inputs": ("core_problem", "competitive_analysis"),
+     "focus": "A competitor table, a SWOT table, the gaps and the underserved segments."},
+    {"key": "roadmap", "title": "🛠 MVP Design & Execution Blueprint",
+     "inputs": ("core_problem", "feature_ideation", "mvp_roadmap"),
+     "focus": "MVP scope, architecture, tech stack, milestones, team and budget."},
+]
+
+report_section_prompt = templates.add_prompt("report_section", """You are writing one section of a brainstorm report; other sections are written separately and placed around it, so cover only this section's topic and don't repeat the others.
+
+## 📐 Formatting
+- Use markdown: lists, tables and callouts (`> **Note:** ...`) where they help. Use ### for sub-headings; don't write the section's own ## heading.
+- Include emojis (✨, 🎯, 💡, 🚀, 💰, 📈, 🤔, ✅ and more) to highlight ideas while keeping it professional.
+- Concise paragraphs and bullet points, engaging and easy to scan for busy stakeholders.
+- End with a bolded one or two sentence TL;DR line: `**TL;DR:** ...`
+""", tools=["generate_report_section"])
+
+report_conclusion_prompt = templates.add_prompt("conclude_report", """These are the TL;DRs of each section of a brainstorm report:
+
+<section_summaries>
+{{summaries}}
+</section_summaries>
+
+Use the `conclude_report` tool to write the report's closing: why the idea matters, the next steps, and a TL;DR of the whole report.
+""")
+
+def report_section_inputs(section, combined_context):
+    defaults = {"core_problem": 'N/A', "debate_log": []}
+    return {name: combined_context.get(name) or defaults.get(name, {}) for name in section["inputs"]}
+
+async def compute_report_section(section, combined_context):
+    sections = await compact_context("generate_report_section", report_section_inputs(section, combined_context))
+    context_block = "\n".join(f"<{name}>\n{text}\n</{name}>" for name, text in sections.items())
+    result = await run_claude_tool(
+        "generate_report_section",
+        report_section_tool,
+        f"Write the \"{section['title']}\" section.\nFocus: {section['focus']}\n\n{context_block}\n\nUse the `generate_report_section` tool.",
+        system=[cached_text_block(report_section_prompt.render())]
+    )
+    content = (result or {}).get("content")
+    if not content:
+        raise ValueError("The model returned no content")
+    return content
+
+def section_tldr(content):
+    # The section's own TL;DR line, or its opening if it didn't write one
+    matches = re.findall(r"\*\*TL;DR:?\*\*:?\s*(.+)", content)
+    return matches[-1].strip() if matches else content.strip()[:400]
+
+def report_section_hash(section, combined_context):
+    # What a section is written from; an unchanged hash means the stored section can be reused
+    return make_cache_key(section=section['key'], title=section['title'], focus=section['focus'],
+                          inputs=report_section_inputs(section, combined_context),
+                          prompt_version=templates.version_of("generate_report_section"))
+
+def report_conclusion_summaries(section_contents):
+    return "\n".join(f"- {section['title']}: {section_tldr(section_contents[section['key']])}"
+                     for section in REPORT_SECTIONS if section_contents.get(section['key']))
+
+async def compute_report_conclusion(summaries):
+    result = await run_claude_tool("conclude_report", report_conclusion_tool, report_conclusion_prompt.render(summaries=summaries))
+    steps = "\n".join(f"  {i}. {step}" for i, step in enumerate(result.get("next_steps", []), 1))
+    return f"""* **Why it matters:** {result.get('why_it_matters', '')}
+* **What's next:**
+{steps}
+
+**TL;DR:** {result.get('tldr', '')}"""
+
+def format_report_section(title, content):
+    return f"## {title}\n\n{content.strip()}"
+
+async def iter_sectional_report(combined_context, max_concurrency=REPORT_SECTION_MAX_CONCURRENCY, stored=None):
+    """
+    Starts every section at once and yields (key, markdown, error, reused) in report order
+    as each becomes ready, then the conclusion. A failed section is replaced by a short note.
+
+    `stored` maps section keys to {"inputs_hash", "content"} from an earlier run (the
+    session's report_sections stage). Sections whose inputs hash the same are reused without
+    a call; the others are regenerated and written back into `stored`.
+    """
+    stored = {} if stored is None else stored
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(section, inputs_hash):
+        async with semaphore:
+            content = await compute_report_section(section, combined_context)
+        stored[section['key']] = {"inputs_hash": inputs_hash, "content": content}
+        return content
+
+    tasks = {}
+    with priority(BULK):
+        for section in REPORT_SECTIONS:
+            inputs_hash = report_section_hash(section, combined_context)
+            if (stored.get(section['key']) or {}).get("inputs_hash") != inputs_hash:
+                tasks[section['key']] = asyncio.ensure_future(bounded(section, inputs_hash))
+    contents = {}
+    try:
+        for section in REPORT_SECTIONS:
+            key = section['key']
+            reused = key not in tasks
+            try:
+                contents[key] = stored[key]["content"] if reused else await tasks[key]
+                yield key, format_report_section(section['title'], contents[key]), None, reused
+            except Exception as e:
+                logger.error(f"Error generating report section '{key}': {e}")
+                note = "> **Note:** This section could not be generated. Regenerate the report to try again."
+                yield key, format_report_section(section['title'], note), str(e), False
+            report_progress(sections_done=len(contents), sections_total=len(REPORT_SECTIONS), last_section=key)
+        try:
+            summaries = report_conclusion_summaries(contents)
+            inputs_hash = make_cache_key(section="conclusion", summaries=summaries,
+                                         prompt_version=templates.version_of("conclude_report"))
+            reused = (stored.get("conclusion") or {}).get("inputs_hash") == inputs_hash
+            if not reused:
+                stored["conclusion"] = {"inputs_hash": inputs_hash, "content": await compute_report_conclusion(summaries)}
+            yield "conclusion", format_report_section("✅ Conclusion & Next Steps", stored["conclusion"]["content"]), None, reused
+        except Exception as e:
+            logger.error(f"Error generating report conclusion: {e}")
+            yield "conclusion", None, str(e), False
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+async def compute_sectional_report(combined_context, max_concurrency=REPORT_SECTION_MAX_CONCURRENCY, stored=None):
+    # Returns (report markdown, {section key: error}, [keys reused from `stored`])
+    parts, errors, reused_keys = [], {}, []
+    async for key, markdown, error, reused in iter_sectional_report(combined_context, max_concurrency, stored):
+        if markdown:
+            parts.append(markdown)
+        if error:
+            errors[key] = error
+        if reused:
+            reused_keys.append(key)
+    if len(errors) >= len(REPORT_SECTIONS):
+        raise RuntimeError(f"Every report section failed: {errors}")
+    return "\n\n---\n\n".join(parts), errors, reused_keys
+
+def stored_report_sections(data):
+    # Copy of the session's per-section outputs, filled in by the run and saved back with save_report_sections
+    if not data.get('session_id'):
+        return None
+    return dict(session_store.get_stage(data['session_id'], 'report_sections') or {})
+
+def save_report_sections(data, stored):
+    # Merged rather than replaced, so two reports regenerating at once don't drop each other's sections
+    if stored is not None:
+        update_session_stage(data, 'report_sections', lambda previous: {**(previous or {}), **stored})
+
+# New endpoint for generating the full report
+@app.route('/api/brainstorm/report/generate_full', methods=['POST'])
+async def generate_full_report():
+    data = await get_request_data()
+    combined_context = data.get('combined_context') # Expect full context
+    if not combined_context and data.get('session_id'):
+        combined_context = build_report_context(session_store.get_stages(data['session_id']))
+
+    if not combined_context:
+        return jsonify({"error": "Missing 'combined_context' in request body"}), 400
+    mode = data.get('mode', REPORT_MODE)
+    if mode not in REPORT_MODES:
+        return jsonify({"error": f"'mode' must be one of {list(REPORT_MODES)}"}), 400
+
+    try:
+        if mode == 'sections':
+            stored = stored_report_sections(data)
+            report_content, errors, reused = await compute_sectional_report(combined_context, stored=stored)
+            save_report_sections(data, stored)
+            save_to_session(data, 'report', report_content)
+            return jsonify({'phase': 'report', 'step': 'full_report', 'data': report_content, 'errors': errors, 'reused_sections': reused})
+
+        report_result = await compute_full_report(combined_context)
 
         # Ensure a fallback if the tool fails or returns empty content
         if not report_result or not report_result.get("full_report_content"):
              error_message = "Error: Full report generation failed. The model did not return content. Please review the context and try again."
-             import sys
-             print(error_message, file=sys.stderr) # Print to stderr
-             sys.stderr.flush() # Force flush
+             logger.error(error_message)
              return jsonify({'phase': 'report', 'step': 'full_report', 'error': error_message}), 500
         else:
             report_content = report_result.get('full_report_content')
 
+        save_to_session(data, 'report', report_content)
         # Return the full report content
         return jsonify({'phase': 'report', 'step': 'full_report', 'data': report_content})
 
     except Exception as e:
         error_message = f"Error generating full report: {e}"
-        import sys
-        print(error_message, file=sys.stderr) # Print to stderr
-        sys.stderr.flush() # Force flush
+        logger.error(error_message)
         # Return error
         return jsonify({'phase': 'report', 'step': 'full_report', 'error': error_message}), 500
 
 
+# Streaming variant: pushes the report to the client as it is written instead of after
+# the whole 16k-token call finishes. Events: `delta` {"text"} as content arrives, then
+# `done` {"stop_reason", "usage"} or `error` {"error"}. In "sections" mode each `delta`
+# is a whole section (in report order, with its `section` key) and `done` carries `errors`.
+@app.route('/api/brainstorm/report/generate_full/stream', methods=['POST'])
+async def stream_full_report():
+    data = await get_request_data()
+    combined_context = data.get('combined_context') # Expect full context
+    if not combined_context and data.get('session_id'):
+        combined_context = build_report_context(session_store.get_stages(data['session_id']))
+
+    if not combined_context:
+        return jsonify({"error": "Missing 'combined_context' in request body"}), 400
+    mode = data.get('mode', REPORT_MODE)
+    if mode not in REPORT_MODES:
+        return jsonify({"error": f"'mode' must be one of {list(REPORT_MODES)}"}), 400
+
+    @stream_with_context
+    async def generate_sections():
+        parts, errors, reused_keys = [], {}, []
+        stored = stored_report_sections(data)
+        try:
+            async for key, markdown, error, reused in iter_sectional_report(combined_context, stored=stored):
+                if error:
+                    errors[key] = error
+                if reused:
+                    reused_keys.append(key)
+                if markdown:
+                    text = markdown if not parts else f"\n\n---\n\n{markdown}"
+                    parts.append(text)
+                    yield format_sse('delta', {'section': key, 'text': text, 'reused': reused})
+            save_report_sections(data, stored)
+            if len(errors) >= len(REPORT_SECTIONS):
+                yield format_sse('error', {'error': f"Error generating full report: every section failed: {errors}"})
+                return
+            save_to_session(data, 'report', "".join(parts))
+            yield format_sse('done', {'phase': 'report', 'step': 'full_report', 'stop_reason': 'end_turn', 'usage': None,
+                                      'errors': errors, 'reused_sections': reused_keys})
+        except Exception as e:
+            logger.error(f"Error streaming sectional report: {e}")
+            yield format_sse('error', {'error': f"Error generating full report: {e}"})
+
+    @stream_with_context # Keeps the request context (used for metrics labels) while the body streams
+    async def generate():
+        report_stream = JsonStringFieldStream("full_report_content")
+        try:
+            async for item in stream_claude_tool("generate_full_report", full_report_tool, await build_full_report_prompt(combined_context)):
+                if item[0] == "input_json":
+                    text = report_stream.feed(item[1])
+                    if text:
+                        yield format_sse('delta', {'text': text})
+                    continue
+                _, report_result, final_message = item
+                if not report_result or not report_result.get("full_report_content"):
+                    yield format_sse('error', {'error': "Error: Full report generation failed. The model did not return content. Please review the context and try again."})
+                    return
+                save_to_session(data, 'report', report_result['full_report_content'])
+                usage = final_message.usage.model_dump() if final_message is not None else None
+                stop_reason = final_message.stop_reason if final_message is not None else "cache_hit"
+                yield format_sse('done', {'phase': 'report', 'step': 'full_report', 'stop_reason': stop_reason, 'usage': usage})
+        except Exception as e:
+            logger.error(f"Error streaming full report: {e}")
+            yield format_sse('error', {'error': f"Error generating full report: {e}"})
+
+    response = await make_response(generate_sections() if mode == 'sections' else generate(), 200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no' # Stop proxies from buffering the stream
+    })
+    response.timeout = None # Long reports outlive Quart's default response timeout
+    return response
+
+
+# === Response Cache ===
+
+@app.route('/api/brainstorm/cache/stats', methods=['GET'])
+async def get_cache_stats():
+    return jsonify({'phase': 'cache', 'step': 'stats', 'enabled': LLM_CACHE_ENABLED, 'data': {**response_cache.stats(), 'coalescing': in_flight_calls.stats()}})
+
+@app.route('/api/brainstorm/cache/clear', methods=['POST'])
+async def clear_cache():
+    response_cache.clear()
+    return jsonify({'phase': 'cache', 'step': 'clear', 'data': response_cache.stats()})
+
+
+# === Instrumentation ===
+
+@app.route('/metrics', methods=['GET'])
+async def get_metrics():
+    return call_metrics.render_prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/api/brainstorm/debug/calls', methods=['GET'])
+async def get_debug_calls():
+    limit = request.args.get('limit', 100, type=int)
+    calls = call_metrics.recent(limit, tool=request.args.get('tool'), endpoint=request.args.get('endpoint'))
+    return jsonify({'phase': 'debug', 'step': 'calls', 'data': calls})
+
+# The model routing table, and how each tier has done on recent calls (optionally for one tool)
+@app.route('/api/brainstorm/debug/models', methods=['GET'])
+async def get_model_routing():
+    comparison = call_metrics.summary(by='tier', tool=request.args.get('tool'))
+    return jsonify({'phase': 'debug', 'step': 'models', 'data': {'routing': model_router.table(), 'tiers': comparison}})
+
+# Hashes and versions of the compiled tool schemas and prompt templates
+@app.route('/api/brainstorm/debug/templates', methods=['GET'])
+async def get_template_manifest():
+    return jsonify({'phase': 'debug', 'step': 'templates', 'data': templates.manifest()})
+
+
+# === Sessions ===
+
+@app.route('/api/brainstorm/session', methods=['POST'])
+async def create_session():
+    session_id = session_store.create()
+    data = await request.get_json(silent=True) or {}
+    if data.get('speculate'):
+        prefetcher.enable(session_id, data.get('speculation_budget_tokens'))
+    # Optionally seed the session with stages the client already has, e.g. combined_context
+    for stage, value in (data.get('stages') or {}).items():
+        session_store.set_stage(session_id, stage, value)
+    return jsonify({'phase': 'session', 'step': 'create', 'data': {'session_id': session_id}}), 201
+
+@app.route('/api/brainstorm/session/<session_id>', methods=['GET'])
+async def get_session(session_id):
+    return jsonify({'phase': 'session', 'step': 'get', 'session_id': session_id, 'data': session_store.get_stages(session_id)})
+
+@app.route('/api/brainstorm/session/<session_id>', methods=['DELETE'])
+async def delete_session(session_id):
+    session_store.delete(session_id)
+    return jsonify({'phase': 'session', 'step': 'delete', 'session_id': session_id})
+
+@app.route('/api/brainstorm/session/<session_id>/stages/<stage>', methods=['GET'])
+async def get_session_stage(session_id, stage):
+    return jsonify({'phase': 'session', 'step': stage, 'session_id': session_id, 'data': session_store.get_stage(session_id, stage)})
+
+@app.route('/api/brainstorm/session/<session_id>/stages/<stage>', methods=['POST'])
+async def set_session_stage(session_id, stage):
+    data = await request.get_json()
+    if not data or 'data' not in data:
+        return jsonify({"error": "Missing 'data' in request body"}), 400
+    session_store.set_stage(session_id, stage, data['data'])
+    return jsonify({'phase': 'session', 'step': stage, 'session_id': session_id, 'data': data['data']})
+
+
+# === Pipeline Orchestration ===
+# Runs the whole brainstorm flow server-side as a dependency graph so independent
+# stages (themes/context, creative expansion/cross analogs, variant scoring, research
+# agents within a round, debate roles within a round) overlap instead of paying one
+# client round-trip per Claude call.
+
+def feasibility_score(feasibility):
+    if not isinstance(feasibility, dict):
+        return 0
+    return sum(feasibility.get(key, 0) or 0 for key in ("technical_feasibility", "market_feasibility", "novelty"))
+
+def build_pipeline_stages(options):
+    current_freewriting = options.get('freewriting', freewriting)
+    detail_answer = options.get('detail_answer', '')
+    pushback_response = options.get('pushback_response', '')
+    agent_names = options.get('research_agents') or DEFAULT_RESEARCH_AGENTS
+    num_research_rounds = options.get('num_research_rounds', 3)
+    num_debate_rounds = options.get('num_debate_rounds', 3)
+    max_concurrency = options.get('max_concurrency', 8)
+
+    def combine_context(r):
+        pushback = r['pushback'] or {}
+        return {
+            "context": r['context'],
+            "clarification": r['clarification'],
+            "detail_answer": detail_answer,
+            "pushback_summary": pushback.get("summary_of_pushback"),
+            "curiosity_question": pushback.get("curiosity_question"),
+            "pushback_response": pushback_response
+        }
+
+    async def score_variants(r):
+        creative_variants = (r['creative_expansion'] or {}).get("scamper_variations", [])
+        cross_variants = (r['cross_analogs'] or {}).get("hybrid_concepts", [])
+        base_context = {
+            "context": r['context'],
+            "clarification": r['clarification'],
+            "detail_answer": detail_answer
+        }
+        return await evaluate_variants(creative_variants + cross_variants, base_context, max_concurrency)
+
+    def select_idea(r):
+        # Honour the user's pick if one was sent, otherwise continue with the best-scored variant
+        if options.get('selected_idea'):
+            return options['selected_idea']
+        variant_results = r['variant_results']
+        if not variant_results:
+            raise ValueError("No idea variants were generated")
+        if options.get('selected_index') is not None:
+            selected_index = options['selected_index']
+            if selected_index >= len(variant_results):
+                raise ValueError(f"'selected_index' {selected_index} is out of range for {len(variant_results)} idea variants")
+            return variant_results[selected_index]['idea']
+        return max(variant_results, key=lambda v: feasibility_score(v['feasibility']))['idea']
+
+    async def research(r):
+        research_results, _ = await run_research_rounds(
+            r['selected_idea'], r['combined_context'], agent_names, num_research_rounds, max_concurrency,
+            novelty=research_novelty({'adaptive': options.get('adaptive_research', RESEARCH_ADAPTIVE)})
+        )
+        return research_results
+
+    async def summarize(r):
+        summary_result = await compute_research_summary(r['research_results'], r['selected_idea'])
+        return (summary_result or {}).get("research_summary", "Summary failed.")
+
+    async def debate(r):
+        agent_states, debate_log, _, stop = await run_debate_rounds(
+            r['selected_idea'], r['research_summary'], num_debate_rounds, max_concurrency=max_concurrency,
+            convergence=debate_convergence({'adaptive': options.get('adaptive_debate', DEBATE_ADAPTIVE)})
+        )
+        return {'agent_states': agent_states, 'debate_log': debate_log, 'stop': stop}
+
+    stages = [
+        Stage('themes', lambda r: compute_themes(current_freewriting)),
+        Stage('context', lambda r: compute_context(current_freewriting)),
+        Stage('clarification', lambda r: compute_clarification(r['context']), ['context']),
+        Stage('pushback', lambda r: compute_pushback(r['context'], r['themes']), ['context', 'themes']),
+        Stage('core_problem', lambda r: compute_core_problem(r['context'], r['clarification']), ['context', 'clarification']),
+        Stage('combined_context', combine_context, ['context', 'clarification', 'pushback']),
+        Stage('creative_expansion', lambda r: compute_creative_expansion(r['core_problem'], r['combined_context']), ['core_problem', 'combined_context']),
+        Stage('cross_analogs', lambda r: compute_cross_analogs(r['core_problem'], r['combined_context']), ['core_problem', 'combined_context']),
+        Stage('variant_results', score_variants, ['creative_expansion', 'cross_analogs']),
+        Stage('selected_idea', select_idea, ['variant_results']),
+        Stage('research_results', research, ['selected_idea', 'combined_context']),
+        Stage('research_summary', summarize, ['research_results']),
+        Stage('debate', debate, ['selected_idea', 'research_summary']),
+        Stage('feature_ideation', lambda r: compute_feature_ideation(r['combined_context'], r['debate']['agent_states']), ['combined_context', 'debate']),
+        Stage('competitive_analysis', lambda r: compute_competitive_analysis(r['combined_context'], r['debate']['agent_states'], r['feature_ideation']), ['feature_ideation']),
+        Stage('mvp_roadmap', lambda r: compute_mvp_roadmap(r['combined_context'], r['debate']['agent_states'], r['feature_ideation'], r['competitive_analysis']), ['competitive_analysis']),
+    ]
+
+    if options.get('include_report'):
+        async def report(r):
+            report_context = build_report_context(dict(r, debate_log=r['debate']['debate_log']))
+            if options.get('report_mode', REPORT_MODE) == 'sections':
+                stored = stored_report_sections(options)
+                report_content, _, _ = await compute_sectional_report(report_context, stored=stored)
+                save_report_sections(options, stored)
+                return report_content
+            report_result = await compute_full_report(report_context)
+            return (report_result or {}).get('full_report_content')
+        stages.append(Stage('report', report, ['core_problem', 'research_summary', 'debate', 'mvp_roadmap']))
+
+    return stages, max_concurrency
+
+@app.route('/api/brainstorm/pipeline/run', methods=['POST'])
+async def run_pipeline():
+    data = await request.get_json() or {}
+    if 'selected_index' in data and (not isinstance(data['selected_index'], int) or data['selected_index'] < 0):
+        return jsonify({"error": "'selected_index' must be a non-negative integer"}), 400
+    for option in ('num_research_rounds', 'num_debate_rounds', 'max_concurrency'):
+        if option in data and (not isinstance(data[option], int) or data[option] < 1):
+            return jsonify({"error": f"'{option}' must be a positive integer"}), 400
+    if data.get('report_mode', REPORT_MODE) not in REPORT_MODES:
+        return jsonify({"error": f"'report_mode' must be one of {list(REPORT_MODES)}"}), 400
+    unknown_agents = [name for name in data.get('research_agents') or [] if name not in {agent['name'] for agent in research_agents}]
+    if unknown_agents:
+        return jsonify({"error": f"Unknown research agents: {unknown_agents}"}), 400
+
+    if data.get('session_id') and not session_store.exists(data['session_id']):
+        raise SessionNotFound(data['session_id'])
+
+    try:
+        stages, max_concurrency = build_pipeline_stages(data)
+        with priority(BULK): # A whole unattended run yields to users stepping through the UI
+            outcome = await run_stages(stages, max_concurrency)
+        if data.get('session_id'):
+            results = outcome['results']
+            for stage, value in results.items():
+                if stage == 'context':
+                    save_to_session(data, 'context_input', value)
+                elif stage == 'debate':
+                    save_to_session(data, 'debate_results', value['agent_states'])
+                    save_to_session(data, 'debate_log', value['debate_log'])
+                else:
+                    save_to_session(data, stage, value)
+        status = 500 if outcome['errors'] else 200
+        return jsonify({'phase': 'pipeline', 'step': 'run', 'data': outcome['results'], 'errors': outcome['errors'],
+                        'skipped': outcome['skipped'], 'timings': outcome['timings'], 'total_seconds': outcome['total_seconds']}), status
+    except Exception as e:
+        logger.error(f"Error in /pipeline/run: {e}")
+        return jsonify({'phase': 'pipeline', 'step': 'run', 'error': str(e)}), 500
+
+
+# === Background Jobs ===
+
+# Stages that can run as jobs: the same body as the endpoint, answered with a job ID right
+# away instead of holding the request open for the whole model call
+JOB_STAGES = {
+    'feature_ideation': '/api/brainstorm/feature_ideation',
+    'competitive_analysis': '/api/brainstorm/competitive_analysis',
+    'mvp_roadmap': '/api/brainstorm/mvp_roadmap',
+    'report': '/api/brainstorm/report/generate_full',
+    'research': '/api/brainstorm/research/run',
+    'debate': '/api/brainstorm/debate/run',
+    'pipeline': '/api/brainstorm/pipeline/run',
+}
+
+async def dispatch_job(job):
+    # Runs the stage's own endpoint on a synthetic request, so validation, session handling
+    # and metrics labels are exactly those of a direct call
+    async with app.test_request_context(JOB_STAGES[job['kind']], method='POST', json=job['payload']):
+        response = await app.full_dispatch_request()
+        return response.status_code, await response.get_json()
+
+job_queue = JobQueue(
+    create_job_store(sqlite_path=os.environ.get("JOB_DB_PATH"), max_jobs=int(os.environ.get("JOB_MAX_IN_MEMORY", "1000"))),
+    dispatch_job,
+    workers=int(os.environ.get("JOB_WORKERS", "4")),
+)
+
+@app.before_serving
+async def start_job_queue():
+    await job_queue.start()
+
+@app.after_serving
+async def stop_job_queue():
+    await job_queue.stop()
+
+@app.errorhandler(JobNotFound)
+async def handle_job_not_found(e):
+    return jsonify({"error": f"Unknown job_id: {e.args[0]}"}), 404
+
+def job_view(job):
+    # The payload can be a whole session's worth of context; clients already have it
+    return {key: value for key, value in job.items() if key != 'payload'}
+
+@app.route('/api/brainstorm/jobs/<stage>', methods=['POST'])
+async def submit_job(stage):
+    if stage not in JOB_STAGES:
+        return jsonify({"error": f"Unknown job stage '{stage}'; expected one of {sorted(JOB_STAGES)}"}), 400
+    data = await request.get_json() or {}
+    if data.get('session_id') and not session_store.exists(data['session_id']):
+        raise SessionNotFound(data['session_id'])
+    job = job_queue.submit(stage, data)
+    return jsonify({'phase': 'jobs', 'step': 'submit', 'data': job_view(job)}), 202
+
+@app.route('/api/brainstorm/jobs/<job_id>', methods=['GET'])
+async def get_job(job_id):
+    return jsonify({'phase': 'jobs', 'step': 'get', 'data': job_view(job_queue.get(job_id))})
+
+# Events: `status` {job} whenever the job changes (status or progress), then `done` {job}
+# with its result, or `error` {job} if it failed
+@app.route('/api/brainstorm/jobs/<job_id>/events', methods=['GET'])
+async def stream_job_events(job_id):
+    job_queue.get(job_id) # 404 before the stream starts
+
+    async def generate():
+        async for job in job_queue.events(job_id):
+            event = {'succeeded': 'done', 'failed': 'error'}.get(job['status'], 'status')
+            yield format_sse(event, job_view(job))
+
+    response = await make_response(generate(), 200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.timeout = None
+    return response
+
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
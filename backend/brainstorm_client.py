@@ -77,6 +77,11 @@ combined_context = {
     "pushback_response": default_pushback_response
 }
 
+# Keep combined_context on the server so later steps only need to send the session_id
+session = call_api("/session", {"stages": {"combined_context": combined_context}})
+session_id = session.get("session_id") if session else None
+print("Session ID:", session_id)
+
 # === Step 2.5: Generate Core Problem Statement ===
 print("\n--- Step 2.5: Core Problem ---")
 core_problem_payload = {"context_input": context_input, "clarification": clarification}
@@ -99,37 +104,26 @@ print(f"Generated {len(all_idea_variants)} idea variants.")
 
 # === Step 4: Pushback + Feasibility for Each Variant ===
 print("\n--- Step 4: Variant Pushback & Feasibility ---")
-variant_results = []
-for idx, idea in enumerate(all_idea_variants):
-    print(f"Processing variant {idx+1}...")
-    # Pushback
-    variant_pushback_payload = {"idea_variant": idea}
-    variant_pushback = call_api("/refine/variant_pushback", variant_pushback_payload)
-
-    # Feasibility
-    variant_context = {
-        "context": context_input,
-        "clarification": clarification,
-        "detail_answer": default_detail_answer,
-        "idea_variant": idea
-    }
-    variant_feasibility_payload = {"idea_variant": idea, "variant_context": variant_context}
-    variant_feasibility = call_api("/refine/variant_feasibility", variant_feasibility_payload)
-
-    variant_results.append({
-        "idea": idea,
-        "pushback": variant_pushback,
-        "feasibility": variant_feasibility
-    })
+# One batch call; the server scores every variant concurrently and keeps input order.
+# Near-duplicates come back once, with the others listed under 'aliases'.
+variant_context = {
+    "context": context_input,
+    "clarification": clarification,
+    "detail_answer": default_detail_answer
+}
+evaluate_payload = {"all_idea_variants": all_idea_variants, "variant_context": variant_context}
+variant_results = call_api("/refine/variants/evaluate", evaluate_payload) or []
 
 # === Step 5: Present All Ideas for User Selection ===
 print("\n--- Step 5: Select Idea ---")
 print("\nIDEA VARIANTS WITH PUSHBACK & FEASIBILITY:\n")
 for idx, result in enumerate(variant_results):
     print(f"[{idx+1}] Idea: {result.get('idea', '[missing]')}")
-    pushback_summary = result.get('pushback', {}).get('summary_of_pushback', '[missing]')
+    for alias in result.get('aliases', []):
+        print(f"    Similar: {alias}")
+    pushback_summary = (result.get('pushback') or {}).get('summary_of_pushback', '[missing]')
     print(f"    Pushback: {pushback_summary}")
-    feasibility_str = json.dumps(result.get('feasibility', {}), indent=4)
+    feasibility_str = json.dumps(result.get('feasibility') or {}, indent=4)
     print(f"    Feasibility: {feasibility_str}\n")
 
 selected_idx = -1
@@ -160,20 +154,16 @@ research_agent_names = [
     "contrarian_research"
 ]
 
-research_results = {agent_name: [] for agent_name in research_agent_names}
 num_research_rounds = 3
-for i in range(num_research_rounds):
-    print(f"Research Round {i+1}/{num_research_rounds}...")
-    for agent_name in research_agent_names:
-        research_payload = {
-            "selected_idea": selected_idea,
-            "agent_name": agent_name,
-            "combined_context": combined_context,
-            "round_num": i + 1
-        }
-        result = call_api("/research/agent", research_payload)
-        if result:
-            research_results[agent_name].append(result)
+# All agents in a round run concurrently on the server; each round builds on the last round's insights
+print(f"Running {num_research_rounds} research rounds with {len(research_agent_names)} agents...")
+research_payload = {
+    "selected_idea": selected_idea,
+    "research_agents": research_agent_names,
+    "num_rounds": num_research_rounds,
+    "session_id": session_id
+}
+research_results = call_api("/research/run", research_payload) or {agent_name: [] for agent_name in research_agent_names}
 
 print("\n=== Research Layer Results ===\n")
 for agent, result_list in research_results.items():
@@ -205,50 +195,28 @@ AGENT_ROLES = [
     "Fusion Agent"
 ]
 
-agent_states = {role: {} for role in AGENT_ROLES}
 num_debate_rounds = 3
+# The server runs each round's roles concurrently and waits for all of them before the next round
+debate_payload = {
+    "selected_idea": selected_idea,
+    "research_summary": research_summary,
+    "num_rounds": num_debate_rounds, # With adaptive on, this is the maximum
+    "adaptive": True, # Stop early once the votes have settled
+    "session_id": session_id # Server stores the final states as debate_results
+}
+debate_run = call_api("/debate/run", debate_payload) or {}
+agent_states = debate_run.get("agent_states") or {role: {} for role in AGENT_ROLES}
+debate_log = debate_run.get("debate_log") or []
+debate_stop = debate_run.get("stop") or {}
+print(f"Debate ran {debate_stop.get('rounds_run', num_debate_rounds)} round(s), stopped because: {debate_stop.get('reason', 'max_rounds')}")
 
-for round_num in range(1, num_debate_rounds + 1):
-    print(f"\n=== Debate Round {round_num} ===\n")
-    round_outputs = {}
-    current_round_feedback = [] # Collect feedback within this round
-
-    for agent_role in AGENT_ROLES:
-        # Prepare feedback from *previous* states of other agents for this agent's turn
-        other_feedback_for_agent = [
-            state.get("insight", "[No insight provided]")
-            for other_role, state in agent_states.items()
-            if other_role != agent_role and state # Ensure state exists
-        ]
-
-        debate_payload = {
-            "selected_idea": selected_idea,
-            "research_summary": research_summary,
-            "agent_role": agent_role,
-            "other_feedback": other_feedback_for_agent, # Feedback from previous states
-            "round_num": round_num
-        }
-        agent_output = call_api("/debate/round", debate_payload)
-
-        if agent_output:
-            round_outputs[agent_role] = agent_output
-            # Collect the insight generated *in this round* to potentially feed to the *next* agent in *this same round*
-            # (Note: The original script seemed to provide feedback from the *start* of the round.
-            # Adjusting here to provide feedback generated *within* the current round for subsequent agents in the same round.
-            # If feedback should only be from the *previous* round, use agent_states as done in the payload.)
-            if "insight" in agent_output:
-                 current_round_feedback.append(agent_output["insight"])
-        else:
-            print(f"Agent {agent_role} failed to respond in round {round_num}.")
-            round_outputs[agent_role] = {} # Store empty dict on failure
-
-    # Update agent_states *after* all agents have taken their turn in the round
-    for agent_role, output in round_outputs.items():
-         agent_states[agent_role] = output # Overwrite with the latest output for the next round
-
+for round_num in range(1, debate_stop.get("rounds_run", num_debate_rounds) + 1):
     print(f"\n--- Round {round_num} Results ---")
-    for agent, output in round_outputs.items():
-        print(f"{agent}:")
+    for turn in debate_log:
+        if turn["round"] != round_num:
+            continue
+        output = turn["data"]
+        print(f"{turn['agent_role']}:")
         print(f"  Insight: {output.get('insight', '[missing]')}")
         print(f"  Critiques: {output.get('critiques', '[missing]')}")
         print(f"  Vote: {output.get('vote', '[missing]')} (weight: {output.get('empirical_weight', '[missing]')})")
@@ -268,31 +236,19 @@ for agent, output in agent_states.items():
 
 # === Step 7: Feature Ideation & Prioritization ===
 print("\n--- Step 7: Feature Ideation ---")
-feature_payload = {
-    "combined_context": combined_context,
-    "debate_results": agent_states # Pass final agent states
-}
+feature_payload = {"session_id": session_id} # combined_context and debate_results come from the session
 feature_ideation = call_api("/feature_ideation", feature_payload)
 if feature_ideation: print("\n=== Feature Ideation & Prioritization ===\n", json.dumps(feature_ideation, indent=2))
 
 # === Step 8: Competitive & Gap Analysis ===
 print("\n--- Step 8: Competitive Analysis ---")
-competitive_payload = {
-    "combined_context": combined_context,
-    "debate_results": agent_states,
-    "feature_ideation": feature_ideation
-}
+competitive_payload = {"session_id": session_id}
 competitive_analysis = call_api("/competitive_analysis", competitive_payload)
 if competitive_analysis: print("\n=== Competitive & Gap Analysis ===\n", json.dumps(competitive_analysis, indent=2))
 
 # === Step 9: MVP Design & Execution Blueprint ===
 print("\n--- Step 9: MVP Roadmap ---")
-mvp_payload = {
-    "combined_context": combined_context,
-    "debate_results": agent_states,
-    "feature_ideation": feature_ideation,
-    "competitive_analysis": competitive_analysis
-}
+mvp_payload = {"session_id": session_id}
 mvp_roadmap = call_api("/mvp_roadmap", mvp_payload)
 if mvp_roadmap: print("\n=== MVP Design & Execution Blueprint ===\n", json.dumps(mvp_roadmap, indent=2))
 
@@ -0,0 +1,113 @@
+# backend/compaction.py
+import asyncio
+import json
+import logging
+import re
+
+# Fields that help the model while it writes but add little for downstream stages
+LOW_VALUE_FIELDS = frozenset({"chain_of_thought"})
+MIN_SECTION_TOKENS = 256
+CHARS_PER_TOKEN = 4
+
+logger = logging.getLogger("brainstorm.compaction")
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English prose and JSON)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def strip_low_value(value, drop_fields=LOW_VALUE_FIELDS, seen=None):
+    """
+    Returns a copy of `value` without `drop_fields`, empty values, and list entries that
+    repeat a string already seen earlier in the walk. Pass the same `seen` set across
+    sections to also drop insights duplicated between them.
+    """
+    seen = set() if seen is None else seen
+    if isinstance(value, dict):
+        stripped = {}
+        for key, item in value.items():
+            if key in drop_fields:
+                continue
+            item = strip_low_value(item, drop_fields, seen)
+            if item not in (None, "", [], {}):
+                stripped[key] = item
+        return stripped
+    if isinstance(value, list):
+        stripped = []
+        for item in value:
+            if isinstance(item, str):
+                key = _normalize(item)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+            else:
+                item = strip_low_value(item, drop_fields, seen)
+                if item in (None, "", [], {}):
+                    continue
+            stripped.append(item)
+        return stripped
+    return value
+
+
+def compact_json(value):
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def plan_summaries(sizes, budget_tokens):
+    """Picks target sizes for the largest sections so the total fits `budget_tokens`."""
+    excess = sum(sizes.values()) - budget_tokens
+    targets = {}
+    for name in sorted(sizes, key=sizes.get, reverse=True):
+        if excess <= 0:
+            break
+        target = max(sizes[name] - excess, MIN_SECTION_TOKENS)
+        if target >= sizes[name]:
+            continue
+        targets[name] = target
+        excess -= sizes[name] - target
+    return targets
+
+
+def truncate_to_tokens(text, max_tokens):
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + " …[truncated]"
+
+
+async def compact_sections(sections, budget_tokens, summarize, label="context"):
+    """
+    Compacts named prompt sections to fit `budget_tokens`: strips low-value fields and
+    duplicates, serializes without indentation, then asks `summarize(name, text, target_tokens)`
+    to condense the largest sections. A section the summarizer can't shrink enough is truncated.
+    Returns {name: text}.
+    """
+    seen = set()
+    texts = {name: compact_json(strip_low_value(value, seen=seen)) for name, value in sections.items()}
+    sizes = {name: estimate_tokens(text) for name, text in texts.items()}
+    targets = plan_summaries(sizes, budget_tokens)
+
+    async def shrink(name):
+        try:
+            summary = await summarize(name, texts[name], targets[name])
+        except Exception as e:
+            logger.error(f"Error summarizing {label} section '{name}': {e}")
+            summary = None
+        # Leave some slack for the estimate before falling back to a hard cut
+        if not summary or estimate_tokens(summary) > targets[name] * 1.2:
+            return truncate_to_tokens(summary or texts[name], targets[name])
+        return summary
+
+    if targets:
+        shrunk = await asyncio.gather(*(shrink(name) for name in targets))
+        texts.update(zip(targets, shrunk))
+    total = sum(estimate_tokens(text) for text in texts.values())
+    logger.info(f"Compacted {label}: ~{sum(sizes.values())} -> ~{total} tokens (budget {budget_tokens}, summarized {list(targets)})")
+    return texts
@@ -0,0 +1,119 @@
+# backend/convergence.py
+import math
+
+from similarity import novelty
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def weighted_vote_stats(agent_states):
+    """
+    Mean and variance of the agents' votes, each weighted by its empirical_weight (equal
+    weights if none are usable). Agents without a numeric vote are left out.
+    """
+    votes = []
+    for state in agent_states.values():
+        vote = _number((state or {}).get("vote"))
+        if vote is None:
+            continue
+        weight = _number(state.get("empirical_weight"))
+        votes.append((vote, max(weight, 0.0) if weight is not None else 0.0))
+    if not votes:
+        return {"agents": 0, "mean": None, "variance": None}
+    total_weight = sum(weight for _, weight in votes)
+    if total_weight <= 0:
+        votes = [(vote, 1.0) for vote, _ in votes]
+        total_weight = float(len(votes))
+    mean = sum(vote * weight for vote, weight in votes) / total_weight
+    variance = sum(weight * (vote - mean) ** 2 for vote, weight in votes) / total_weight
+    return {"agents": len(votes), "mean": round(mean, 4), "variance": round(variance, 4)}
+
+
+def vote_deltas(previous_states, agent_states):
+    """Absolute change in each agent's vote since the previous round (agents with both votes only)."""
+    deltas = {}
+    for role, state in agent_states.items():
+        before = _number((previous_states.get(role) or {}).get("vote"))
+        after = _number((state or {}).get("vote"))
+        if before is not None and after is not None:
+            deltas[role] = round(abs(after - before), 4)
+    return deltas
+
+
+class DebateConvergence:
+    """
+    Decides after each debate round whether another round is worth running. Stops with
+    "consensus" once the weighted vote variance is at most `consensus_variance`, or with
+    "converged" once no agent's vote moved more than `max_vote_delta` and the variance
+    changed by at most `max_variance_change` since the previous round. Neither is checked
+    before `min_rounds`, or in a round where a turn failed (its state would look unchanged).
+    """
+
+    def __init__(self, max_vote_delta=0.5, max_variance_change=0.25, consensus_variance=0.1, min_rounds=2):
+        self.max_vote_delta = max_vote_delta
+        self.max_variance_change = max_variance_change
+        self.consensus_variance = consensus_variance
+        self.min_rounds = min_rounds
+        self.rounds = []
+
+    def observe(self, round_num, previous_states, agent_states, complete=True):
+        """Records the round's statistics and returns the reason to stop, or None to continue."""
+        stats = weighted_vote_stats(agent_states)
+        deltas = vote_deltas(previous_states, agent_states)
+        stats["round"] = round_num
+        stats["vote_deltas"] = deltas
+        stats["max_vote_delta"] = max(deltas.values()) if deltas else None
+        previous_variance = self.rounds[-1]["variance"] if self.rounds else None
+        stats["variance_change"] = (
+            round(abs(stats["variance"] - previous_variance), 4)
+            if stats["variance"] is not None and previous_variance is not None else None
+        )
+        self.rounds.append(stats)
+
+        if round_num < self.min_rounds or not complete or stats["variance"] is None:
+            return None
+        if stats["variance"] <= self.consensus_variance:
+            return "consensus"
+        # Every agent has to have a vote in both rounds to call the positions stable
+        if (len(deltas) == len(agent_states) and stats["max_vote_delta"] <= self.max_vote_delta
+                and stats["variance_change"] is not None and stats["variance_change"] <= self.max_variance_change):
+            return "converged"
+        return None
+
+
+class ResearchNovelty:
+    """
+    Tracks each research agent's summarized_insights across rounds and retires an agent
+    once a round's insights add less than `min_novelty` over its earlier rounds (see
+    similarity.novelty). Agents are never retired before `min_rounds`.
+    """
+
+    def __init__(self, min_novelty=0.25, min_rounds=2):
+        self.min_novelty = min_novelty
+        self.min_rounds = min_rounds
+        self.seen = {}  # agent -> insights from earlier rounds
+        self.scores = {}  # agent -> [novelty per round]
+        self.stopped = {}  # agent -> round it stopped after
+
+    def observe(self, round_num, agent_name, insights):
+        """Records an agent's round and returns True if the agent should stop."""
+        insights = [str(insight) for insight in insights or []]
+        score = round(novelty(insights, self.seen.get(agent_name, [])), 4)
+        self.scores.setdefault(agent_name, []).append(score)
+        self.seen.setdefault(agent_name, []).extend(insights)
+        if round_num >= self.min_rounds and score < self.min_novelty:
+            self.stopped[agent_name] = round_num
+            return True
+        return False
+
+    def summary(self):
+        return {
+            agent_name: {"novelty": scores, "stopped_after_round": self.stopped.get(agent_name)}
+            for agent_name, scores in self.scores.items()
+        }
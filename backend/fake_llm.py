@@ -0,0 +1,199 @@
+# backend/fake_llm.py
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import uuid
+
+from anthropic.types import InputJSONDelta, Message, RawContentBlockDeltaEvent
+
+# (median seconds, lognormal sigma, share of the latency spent before the first token)
+DEFAULT_LATENCIES = {
+    "default": {"median": 3.0, "sigma": 0.4, "ttft_share": 0.25},
+    "extract_themes": {"median": 1.5, "sigma": 0.3, "ttft_share": 0.4},
+    "constructive_pushback": {"median": 2.0, "sigma": 0.3, "ttft_share": 0.4},
+    "variant_pushback": {"median": 2.0, "sigma": 0.3, "ttft_share": 0.4},
+    "score_feasibility": {"median": 1.5, "sigma": 0.3, "ttft_share": 0.4},
+    "score_feasibility_batch": {"median": 3.5, "sigma": 0.3, "ttft_share": 0.2},
+    "agent_debate_round": {"median": 8.0, "sigma": 0.35, "ttft_share": 0.15},
+    "generate_full_report": {"median": 45.0, "sigma": 0.25, "ttft_share": 0.05},
+    "generate_report_section": {"median": 9.0, "sigma": 0.3, "ttft_share": 0.1},
+    "conclude_report": {"median": 2.0, "sigma": 0.3, "ttft_share": 0.3},
+}
+
+# Latency multiplier for models whose name contains the key (smaller models answer faster)
+DEFAULT_MODEL_SPEEDUPS = {"haiku": 0.4}
+
+_WORDS = (
+    "feedback users inbox triage signal priority channel integration workflow latency market segment "
+    "adoption retention pricing onboarding automation insight risk evidence roadmap milestone pilot "
+    "cohort churn revenue competitor differentiation trust privacy scale metric experiment"
+).split()
+
+_REPORT_SECTIONS = (
+    "Executive Summary", "Problem Definition & Refinement", "Idea Exploration & Selection", "Research Insights",
+    "Debate Perspectives", "Feature Ideation & Prioritization", "Competitive & Gap Analysis",
+    "MVP Design & Execution Blueprint", "Conclusion & Next Steps"
+)
+
+
+def _sentence(rng, min_words=8, max_words=20):
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def _estimate_tokens(value):
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return max(1, len(text) // 4)
+
+
+def synthesize(schema, rng, field=""):
+    """Builds a value that validates against a (tool input) JSON schema."""
+    schema_type = schema.get("type")
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    if schema_type == "object":
+        return {name: synthesize(prop, rng, name) for name, prop in schema.get("properties", {}).items()}
+    if schema_type == "array":
+        count = rng.randint(max(2, schema.get("minItems", 0)), max(4, schema.get("minItems", 0)))
+        if "maxItems" in schema:
+            count = min(count, schema["maxItems"])
+        return [synthesize(schema.get("items", {"type": "string"}), rng, field) for _ in range(count)]
+    if schema_type == "number":
+        # Weights in this app are 0-1, every other score is on a 1-10 scale
+        return round(rng.uniform(0.3, 0.95), 2) if "weight" in field else round(rng.uniform(3, 9), 1)
+    if schema_type == "integer":
+        return rng.randint(1, 10)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    return f"{field.replace('_', ' ').capitalize() or 'Text'}: {_sentence(rng)}"
+
+
+def synthesize_section(rng, words_per_section=160):
+    paragraph = " ".join(_sentence(rng) for _ in range(max(1, words_per_section // 14)))
+    return f"{paragraph}\n\n* {_sentence(rng, 5, 10)}\n* {_sentence(rng, 5, 10)}\n\n**TL;DR:** {_sentence(rng)}"
+
+
+def synthesize_report(rng, words_per_section=160):
+    return "\n\n---\n\n".join(f"## {title}\n\n{synthesize_section(rng, words_per_section)}" for title in _REPORT_SECTIONS)
+
+
+class FakeAsyncAnthropic:
+    """
+    Offline stand-in for the parts of AsyncAnthropic this app uses (`messages.create` and
+    `messages.stream`). Tool outputs are synthesized from the forced tool's input_schema
+    and are deterministic for a given request and seed; latency is drawn from a per-tool
+    lognormal distribution scaled by `latency_scale` and by the model's entry in
+    `model_speedups`.
+    """
+
+    def __init__(self, seed=0, latencies=None, latency_scale=1.0, report_words_per_section=160, model_speedups=None):
+        self.seed = seed
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.latency_scale = latency_scale
+        self.model_speedups = DEFAULT_MODEL_SPEEDUPS if model_speedups is None else model_speedups
+        self.report_words_per_section = report_words_per_section
+        self._cached_prefixes = set()
+        self._lock = threading.Lock()
+        self.messages = _FakeMessages(self)
+
+    def _rng(self, request):
+        digest = hashlib.sha256(json.dumps([self.seed, request], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return random.Random(digest)
+
+    def _timing(self, tool_name, model, rng):
+        profile = {**self.latencies["default"], **self.latencies.get(tool_name, {})}
+        latency = profile["median"] * math.exp(rng.gauss(0, profile["sigma"])) * self.latency_scale
+        for name, factor in self.model_speedups.items():
+            if name in (model or ""):
+                latency *= factor
+        return latency, latency * profile["ttft_share"]
+
+    def _usage(self, request, output):
+        # Mirrors prompt caching: the prefix up to the last cache_control breakpoint is written once, then read
+        prefix = [request.get("tools"), request.get("system")]
+        has_breakpoint = "cache_control" in json.dumps(prefix)
+        prefix_tokens = _estimate_tokens(prefix) if has_breakpoint else 0
+        total_tokens = _estimate_tokens([request.get("tools"), request.get("system"), request.get("messages")])
+        usage = {"input_tokens": total_tokens - prefix_tokens, "output_tokens": _estimate_tokens(output),
+                 "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        if has_breakpoint:
+            prefix_hash = hashlib.sha256(json.dumps([request.get("model"), prefix], sort_keys=True).encode("utf-8")).hexdigest()
+            with self._lock:
+                seen = prefix_hash in self._cached_prefixes
+                self._cached_prefixes.add(prefix_hash)
+            usage["cache_read_input_tokens" if seen else "cache_creation_input_tokens"] = prefix_tokens
+        return usage
+
+    def build(self, request):
+        """Returns (message, latency, ttft) for a messages.create request."""
+        tool_name = (request.get("tool_choice") or {}).get("name")
+        tool = next((t for t in request.get("tools", []) if t["name"] == tool_name), None)
+        rng = self._rng(request)
+        tool_input = synthesize(tool["input_schema"], rng) if tool else {}
+        if tool_name == "generate_full_report":
+            tool_input["full_report_content"] = synthesize_report(rng, self.report_words_per_section)
+        elif tool_name == "generate_report_section":
+            tool_input["content"] = synthesize_section(rng, self.report_words_per_section)
+        elif tool_name == "score_feasibility_batch":
+            # One score per variant in the prompt, like the real model is asked to return
+            item_schema = tool["input_schema"]["properties"]["scores"]["items"]
+            variant_ids = re.findall(r'<variant id=\\"(\d+)\\">', json.dumps(request.get("messages")))
+            tool_input["scores"] = [dict(synthesize(item_schema, rng), variant_id=int(i)) for i in variant_ids]
+        latency, ttft = self._timing(tool_name, request.get("model"), rng)
+        message = Message.model_validate({
+            "id": f"msg_fake_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model"),
+            "content": [{"type": "tool_use", "id": f"toolu_fake_{uuid.uuid4().hex[:20]}", "name": tool_name, "input": tool_input}],
+            "stop_reason": "tool_use",
+            "stop_sequence": None,
+            "usage": self._usage(request, tool_input),
+        })
+        return message, latency, ttft
+
+
+class _FakeMessages:
+    def __init__(self, llm):
+        self._llm = llm
+
+    async def create(self, **request):
+        message, latency, _ = self._llm.build(request)
+        await asyncio.sleep(latency)
+        return message
+
+    def stream(self, **request):
+        return _FakeMessageStream(self._llm, request)
+
+
+class _FakeMessageStream:
+    """Async context manager/iterator shaped like the SDK's AsyncMessageStream."""
+
+    def __init__(self, llm, request, fragment_chars=64):
+        self._message, self._latency, self._ttft = llm.build(request)
+        self._fragment_chars = fragment_chars
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        await asyncio.sleep(self._ttft)
+        document = json.dumps(self._message.content[0].input, ensure_ascii=False)
+        fragments = [document[i:i + self._fragment_chars] for i in range(0, len(document), self._fragment_chars)]
+        gap = (self._latency - self._ttft) / max(1, len(fragments))
+        for fragment in fragments:
+            yield RawContentBlockDeltaEvent(type="content_block_delta", index=0, delta=InputJSONDelta(type="input_json_delta", partial_json=fragment))
+            await asyncio.sleep(gap)
+
+    async def get_final_message(self):
+        return self._message
@@ -0,0 +1,253 @@
+# backend/jobs.py
+import asyncio
+import contextvars
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger("brainstorm.jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+# (JobQueue, job_id) of the job the current task is running, for report_progress
+current_job = contextvars.ContextVar("current_job", default=None)
+
+
+class JobNotFound(KeyError):
+    pass
+
+
+def report_progress(**fields):
+    """Merges `fields` into the running job's progress. Does nothing outside a job."""
+    job = current_job.get()
+    if job is not None:
+        queue, job_id = job
+        queue.progress(job_id, **fields)
+
+
+def _new_job(kind, payload):
+    now = time.time()
+    return {
+        'id': uuid.uuid4().hex, 'kind': kind, 'payload': payload, 'status': QUEUED, 'attempts': 0,
+        'progress': {}, 'result': None, 'status_code': None, 'error': None,
+        'created_at': now, 'updated_at': now, 'started_at': None, 'finished_at': None,
+    }
+
+
+class InMemoryJobStore:
+    """Keeps jobs in process. Past `max_jobs`, the jobs that finished first are dropped."""
+
+    def __init__(self, max_jobs=1000):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()  # job_id -> job dict serialized as JSON
+        self._finished = OrderedDict()  # job_id -> None, in the order the jobs finished
+        self._lock = threading.Lock()
+
+    def create(self, kind, payload):
+        job = _new_job(kind, payload)
+        with self._lock:
+            self._jobs[job['id']] = json.dumps(job)
+            while len(self._jobs) > self.max_jobs and self._finished:
+                job_id, _ = self._finished.popitem(last=False)
+                self._jobs.pop(job_id, None)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            serialized = self._jobs.get(job_id)
+        if serialized is None:
+            raise JobNotFound(job_id)
+        return json.loads(serialized)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            serialized = self._jobs.get(job_id)
+            if serialized is None:
+                raise JobNotFound(job_id)
+            job = dict(json.loads(serialized), **fields, updated_at=time.time())
+            self._jobs[job_id] = json.dumps(job)
+            if job['status'] in FINISHED:
+                self._finished[job_id] = None
+        return job
+
+    def unfinished(self):
+        with self._lock:
+            jobs = [json.loads(serialized) for serialized in self._jobs.values()]
+        return [job for job in jobs if job['status'] not in FINISHED]
+
+
+class SQLiteJobStore:
+    """Same interface as InMemoryJobStore, persisted so queued and interrupted jobs survive a restart."""
+
+    _COLUMNS = ('id', 'kind', 'payload', 'status', 'attempts', 'progress', 'result', 'status_code', 'error',
+                'created_at', 'updated_at', 'started_at', 'finished_at')
+    _JSON_COLUMNS = ('payload', 'progress', 'result')
+
+    def __init__(self, path, retention=7 * 24 * 3600):
+        self.retention = retention
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT, payload TEXT, status TEXT, "
+                "attempts INTEGER, progress TEXT, result TEXT, status_code INTEGER, error TEXT, "
+                "created_at REAL, updated_at REAL, started_at REAL, finished_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            self._db.commit()
+
+    def _row(self, job):
+        return tuple(json.dumps(job[column]) if column in self._JSON_COLUMNS else job[column] for column in self._COLUMNS)
+
+    def _job(self, row):
+        return {column: json.loads(value) if column in self._JSON_COLUMNS else value for column, value in zip(self._COLUMNS, row)}
+
+    def create(self, kind, payload):
+        job = _new_job(kind, payload)
+        with self._lock:
+            self._db.execute(f"INSERT INTO jobs VALUES ({', '.join('?' * len(self._COLUMNS))})", self._row(job))
+            # Finished jobs are only kept around long enough for clients to collect them
+            self._db.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (*FINISHED, time.time() - self.retention))
+            self._db.commit()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute(f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise JobNotFound(job_id)
+        return self._job(row)
+
+    def update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        values = [json.dumps(value) if column in self._JSON_COLUMNS else value for column, value in fields.items()]
+        with self._lock:
+            if self._db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*values, job_id)).rowcount == 0:
+                raise JobNotFound(job_id)
+            self._db.commit()
+        return self.get(job_id)
+
+    def unfinished(self):
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE status NOT IN (?, ?) ORDER BY created_at", FINISHED
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+
+def create_job_store(sqlite_path=None, max_jobs=1000):
+    if sqlite_path:
+        return SQLiteJobStore(sqlite_path)
+    return InMemoryJobStore(max_jobs=max_jobs)
+
+
+class JobQueue:
+    """
+    Runs submitted jobs on `workers` background tasks. `run_job(job)` does the work and
+    returns (status_code, result); a status code of 400 or more marks the job failed.
+    Jobs left queued or running by a previous process are queued again on start(), up
+    to `max_attempts` runs per job.
+    """
+
+    def __init__(self, store, run_job, workers=4, max_attempts=3):
+        self.store = store
+        self.run_job = run_job
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._queue = None
+        self._tasks = []
+        self._changed = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._changed = asyncio.Event()
+        for job in self.store.unfinished():
+            if job['attempts'] >= self.max_attempts:
+                self._finish(job['id'], FAILED, error=f"Interrupted {job['attempts']} times; not retried again")
+                continue
+            if job['status'] == RUNNING:
+                logger.info(f"Re-queuing job {job['id']} ({job['kind']}) interrupted by a restart")
+                self.store.update(job['id'], status=QUEUED)
+            self._queue.put_nowait(job['id'])
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        # Running jobs stay marked running, so the next start() picks them up again
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, kind, payload):
+        if self._queue is None:
+            raise RuntimeError("The job queue has not been started")
+        job = self.store.create(kind, payload)
+        self._queue.put_nowait(job['id'])
+        return job
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def progress(self, job_id, **fields):
+        job = self.store.get(job_id)
+        self.store.update(job_id, progress=dict(job['progress'] or {}, **fields))
+        self._notify()
+
+    async def events(self, job_id, poll_interval=5.0):
+        """Yields the job each time it changes, ending with its finished state."""
+        job = self.store.get(job_id)
+        yield job
+        while job['status'] not in FINISHED:
+            # Taken before the read, so a change made while the caller handled the last
+            # yield (or right after this read) has already set it and the wait returns
+            changed = self._changed
+            latest = self.store.get(job_id)
+            if latest['updated_at'] != job['updated_at'] or latest['status'] != job['status']:
+                job = latest
+                yield job
+                continue
+            # Polled as well, in case the store was changed by another process
+            try:
+                await asyncio.wait_for(changed.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _notify(self):
+        # Wakes every subscriber waiting on the current event; later waits get a fresh one
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    def _finish(self, job_id, status, **fields):
+        self.store.update(job_id, status=status, finished_at=time.time(), **fields)
+        self._notify()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self.store.update(job_id, status=RUNNING, started_at=time.time(), attempts=self.store.get(job_id)['attempts'] + 1)
+                self._notify()
+                token = current_job.set((self, job_id))
+                try:
+                    status_code, result = await self.run_job(job)
+                finally:
+                    current_job.reset(token)
+                error = (result or {}).get('error') if status_code >= 400 else None
+                self._finish(job_id, FAILED if status_code >= 400 else SUCCEEDED, status_code=status_code, result=result, error=error)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                self._finish(job_id, FAILED, error=str(e))
+            finally:
+                self._queue.task_done()
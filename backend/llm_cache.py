@@ -0,0 +1,175 @@
+# backend/llm_cache.py
+import asyncio
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(**request_fields):
+    """Content-addressed key: a SHA-256 over the canonical JSON of everything sent to the model."""
+    canonical = json.dumps(request_fields, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for tool outputs: an in-memory LRU in front of an optional SQLite file.
+    Entries expire after a per-tool TTL and both tiers are bounded by entry count.
+    Values are stored as JSON so every hit hands back a fresh copy the caller may mutate.
+    A disk hit only rewrites the entry's last access time once it is `touch_interval`
+    seconds old, so most hits don't cost a write and commit on the event loop.
+    """
+
+    def __init__(self, max_entries=1024, default_ttl=24 * 3600, tool_ttls=None, sqlite_path=None, sqlite_max_entries=10000, touch_interval=600):
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.default_ttl = default_ttl
+        self.tool_ttls = dict(tool_ttls or {})
+        self.sqlite_max_entries = sqlite_max_entries
+        self._memory = OrderedDict()  # key -> (expires_at, json_value)
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'disk_hits': 0, 'sets': 0, 'memory_evictions': 0, 'disk_evictions': 0, 'expirations': 0}
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, tool_name TEXT, value TEXT, expires_at REAL, last_access REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+            self._db.commit()
+
+    def ttl_for(self, tool_name):
+        return self.tool_ttls.get(tool_name, self.default_ttl)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters['hits'] += 1
+                    self._counters['memory_hits'] += 1
+                    return json.loads(value)
+                del self._memory[key]
+                self._counters['expirations'] += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires_at, last_access FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, expires_at, last_access = row
+                    if expires_at > now:
+                        # Eviction only needs a rough recency order
+                        if now - last_access >= self.touch_interval:
+                            self._db.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                            self._db.commit()
+                        self._remember(key, expires_at, value)
+                        self._counters['hits'] += 1
+                        self._counters['disk_hits'] += 1
+                        return json.loads(value)
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._counters['expirations'] += 1
+
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key, tool_name, value):
+        now = time.time()
+        expires_at = now + self.ttl_for(tool_name)
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._counters['sets'] += 1
+            self._remember(key, expires_at, serialized)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, tool_name, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, tool_name, serialized, expires_at, now)
+                )
+                overflow = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.sqlite_max_entries
+                if overflow > 0:
+                    self._db.execute(
+                        "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                        (overflow,)
+                    )
+                    self._counters['disk_evictions'] += overflow
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_entries'] = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] if self._db is not None else None
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _remember(self, key, expires_at, serialized):
+        # Caller holds the lock
+        self._memory[key] = (expires_at, serialized)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters['memory_evictions'] += 1
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller starts `call()` and anyone
+    arriving with the same key while it is running awaits that same call instead of making
+    their own. Every caller gets its own copy of the result (or the same exception).
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> [asyncio.Task, callers waiting, detachable]
+        self._counters = {'calls': 0, 'coalesced': 0}
+
+    async def do(self, key, call, detachable=False):
+        """
+        Returns (result, coalesced). A call whose callers were all `detachable` (speculative)
+        is cancelled when the last of them is; anyone else joining keeps it running.
+        """
+        entry = self._calls.get(key)
+        coalesced = entry is not None
+        if coalesced:
+            self._counters['coalesced'] += 1
+            entry[2] = entry[2] and detachable
+        else:
+            self._counters['calls'] += 1
+            task = asyncio.ensure_future(call())
+            entry = self._calls[key] = [task, 0, detachable]
+            task.add_done_callback(lambda done: self._finished(key, done))
+        task = entry[0]
+        entry[1] += 1
+        try:
+            # Shielded so one caller disconnecting doesn't cancel the call for everyone else
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if entry[1] == 1 and entry[2] and not task.done():
+                task.cancel()
+            raise
+        finally:
+            entry[1] -= 1
+        return copy.deepcopy(result), coalesced
+
+    def _finished(self, key, task):
+        if key in self._calls and self._calls[key][0] is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Marks it retrieved even if every caller has gone away
+
+    def stats(self):
+        return {**self._counters, 'in_flight': len(self._calls)}
@@ -0,0 +1,179 @@
+# backend/metrics.py
+import threading
+import time
+from collections import deque
+
+# Seconds; Claude calls here range from sub-second cache-warm turns to multi-minute reports
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, 240)
+LABELS = ("tool", "endpoint", "model", "tier")
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class CallMetrics:
+    """
+    Per-call instrumentation for Claude tool calls: the last `capacity` calls are kept in a
+    ring buffer for inspection, and running counters and latency histograms per
+    (tool, endpoint, model, tier) are rendered in the Prometheus text format.
+    `tier_of(model)` names the model's tier (see model_routing).
+    """
+
+    def __init__(self, capacity=1000, buckets=LATENCY_BUCKETS, tier_of=None):
+        self.buckets = tuple(buckets)
+        self.tier_of = tier_of or (lambda model: None)
+        self._calls = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._calls_total = {}  # labels + (status,) -> count
+        self._tokens_total = {}  # labels + (token type,) -> count
+        self._retries_total = {}  # labels -> count
+        self._incomplete_total = {}  # labels -> count
+        self._latency = {}  # labels -> Histogram
+        self._ttft = {}  # labels -> Histogram
+
+    def record(self, tool, endpoint=None, model=None, latency=None, ttft=None, usage=None,
+               stop_reason=None, retries=0, cache_hit=False, coalesced=False, error=None, streamed=False, incomplete=False):
+        tier = self.tier_of(model)
+        call = {
+            "timestamp": time.time(),
+            "tool": tool,
+            "endpoint": endpoint,
+            "model": model,
+            "tier": tier,
+            "latency_seconds": round(latency, 4) if latency is not None else None,
+            "ttft_seconds": round(ttft, 4) if ttft is not None else None,
+            **{field: (usage or {}).get(field) for field in TOKEN_FIELDS},
+            "stop_reason": stop_reason,
+            "retries": retries,
+            "cache_hit": cache_hit,
+            "coalesced": coalesced,
+            "streamed": streamed,
+            "error": error,
+            "incomplete": incomplete,
+        }
+        labels = (tool, endpoint or "", model or "", tier or "")
+        # Neither a cache hit nor a call coalesced onto an identical one in flight reaches the API
+        served_locally = cache_hit or coalesced
+        status = "cache_hit" if cache_hit else "coalesced" if coalesced else "error" if error else (stop_reason or "unknown")
+        with self._lock:
+            self._calls.append(call)
+            self._calls_total[labels + (status,)] = self._calls_total.get(labels + (status,), 0) + 1
+            if retries:
+                self._retries_total[labels] = self._retries_total.get(labels, 0) + retries
+            if incomplete:
+                self._incomplete_total[labels] = self._incomplete_total.get(labels, 0) + 1
+            for field in TOKEN_FIELDS:
+                if call[field]:
+                    key = labels + (field.replace("_tokens", ""),)
+                    self._tokens_total[key] = self._tokens_total.get(key, 0) + call[field]
+            # Calls served locally would only drag the latency distribution down
+            if not served_locally and latency is not None:
+                self._latency.setdefault(labels, Histogram(self.buckets)).observe(latency)
+            if not served_locally and ttft is not None:
+                self._ttft.setdefault(labels, Histogram(self.buckets)).observe(ttft)
+        return call
+
+    def recent(self, limit=100, tool=None, endpoint=None):
+        with self._lock:
+            calls = list(self._calls)
+        calls = [call for call in calls if (tool is None or call["tool"] == tool) and (endpoint is None or call["endpoint"] == endpoint)]
+        return calls[-limit:][::-1]  # Newest first
+
+    def summary(self, by="tier", tool=None):
+        """
+        Per-`by` comparison over the recent calls that reached the API: latency percentiles,
+        error and incomplete-output rates, and mean output tokens.
+        """
+        with self._lock:
+            calls = [call for call in self._calls if not (call["cache_hit"] or call["coalesced"])]
+        groups = {}
+        for call in calls:
+            if tool is None or call["tool"] == tool:
+                groups.setdefault(call[by], []).append(call)
+        summary = {}
+        for key, group in groups.items():
+            latencies = sorted(call["latency_seconds"] for call in group if call["latency_seconds"] is not None)
+            output_tokens = [call["output_tokens"] for call in group if call["output_tokens"] is not None]
+            summary[key] = {
+                "calls": len(group),
+                "error_rate": round(sum(1 for call in group if call["error"]) / len(group), 4),
+                "incomplete_rate": round(sum(1 for call in group if call["incomplete"]) / len(group), 4),
+                "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+                "latency_p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+                "mean_output_tokens": round(sum(output_tokens) / len(output_tokens), 1) if output_tokens else None,
+            }
+        return summary
+
+    def render_prometheus(self):
+        with self._lock:
+            calls_total = dict(self._calls_total)
+            tokens_total = dict(self._tokens_total)
+            retries_total = dict(self._retries_total)
+            incomplete_total = dict(self._incomplete_total)
+            histograms = {
+                "brainstorm_llm_call_latency_seconds": {labels: (list(h.counts), h.sum, h.count) for labels, h in self._latency.items()},
+                "brainstorm_llm_time_to_first_token_seconds": {labels: (list(h.counts), h.sum, h.count) for labels, h in self._ttft.items()},
+            }
+
+        lines = [
+            "# HELP brainstorm_llm_calls_total Claude tool calls by outcome (stop_reason, error, cache_hit or coalesced).",
+            "# TYPE brainstorm_llm_calls_total counter",
+        ]
+        for key, value in sorted(calls_total.items()):
+            lines.append(f"brainstorm_llm_calls_total{_format_labels(list(zip(LABELS + ('status',), key)))} {value}")
+        lines += [
+            "# HELP brainstorm_llm_tokens_total Tokens reported by the API, by type.",
+            "# TYPE brainstorm_llm_tokens_total counter",
+        ]
+        for key, value in sorted(tokens_total.items()):
+            lines.append(f"brainstorm_llm_tokens_total{_format_labels(list(zip(LABELS + ('type',), key)))} {value}")
+        lines += [
+            "# HELP brainstorm_llm_retries_total Retries taken before a call succeeded or gave up.",
+            "# TYPE brainstorm_llm_retries_total counter",
+        ]
+        for key, value in sorted(retries_total.items()):
+            lines.append(f"brainstorm_llm_retries_total{_format_labels(list(zip(LABELS, key)))} {value}")
+        lines += [
+            "# HELP brainstorm_llm_incomplete_outputs_total Calls whose tool input was missing, truncated or lacked required fields.",
+            "# TYPE brainstorm_llm_incomplete_outputs_total counter",
+        ]
+        for key, value in sorted(incomplete_total.items()):
+            lines.append(f"brainstorm_llm_incomplete_outputs_total{_format_labels(list(zip(LABELS, key)))} {value}")
+
+        help_text = {
+            "brainstorm_llm_call_latency_seconds": "Wall time of Claude calls that reached the API.",
+            "brainstorm_llm_time_to_first_token_seconds": "Time until the first streamed content delta (streamed calls only).",
+        }
+        for name, series in histograms.items():
+            lines += [f"# HELP {name} {help_text[name]}", f"# TYPE {name} histogram"]
+            for labels, (counts, total, count) in sorted(series.items()):
+                pairs = list(zip(LABELS, labels))
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{name}_bucket{_format_labels(pairs + [('le', bound)])} {bucket_count}")
+                lines.append(f"{name}_bucket{_format_labels(pairs + [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{_format_labels(pairs)} {round(total, 6)}")
+                lines.append(f"{name}_count{_format_labels(pairs)} {count}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,80 @@
+# backend/model_routing.py
+import json
+
+DEFAULT_TIERS = {
+    "large": "claude-3-7-sonnet-20250219",
+    "small": "claude-3-5-haiku-20241022",
+}
+DEFAULT_TIER = "large"
+
+# Short structured extractions and scoring; debate, research, synthesis and reports stay large
+DEFAULT_TOOL_TIERS = {
+    "extract_themes": "small",
+    "variant_pushback": "small",
+    "score_feasibility": "small",
+    "score_feasibility_batch": "small",
+    "conclude_report": "small",
+}
+
+# Endpoint (route pattern) -> a tier for every call it makes, or {tool name: tier}.
+# Calls made from a pipeline, job or prefetch don't carry the stage's own endpoint, so
+# anything that must hold across all of them belongs in the tool tiers instead.
+DEFAULT_ENDPOINT_TIERS = {}
+
+
+class ModelRouter:
+    """
+    Picks the model for each call by tier. The most specific rule wins: the endpoint's
+    rule for the tool, then the endpoint's rule for all of its calls, then the tool's
+    tier, then `default_tier`.
+    """
+
+    def __init__(self, tiers=None, default_tier=DEFAULT_TIER, tools=None, endpoints=None):
+        self.tiers = dict(tiers or DEFAULT_TIERS)
+        self.default_tier = default_tier
+        self.tools = dict(DEFAULT_TOOL_TIERS if tools is None else tools)
+        self.endpoints = dict(DEFAULT_ENDPOINT_TIERS if endpoints is None else endpoints)
+        rules = [default_tier, *self.tools.values()]
+        for rule in self.endpoints.values():
+            rules += rule.values() if isinstance(rule, dict) else [rule]
+        unknown = sorted(set(rules) - set(self.tiers))
+        if unknown:
+            raise ValueError(f"Unknown model tiers {unknown}; configured tiers are {sorted(self.tiers)}")
+        self._tier_of_model = {model: tier for tier, model in self.tiers.items()}
+
+    @classmethod
+    def from_config(cls, path=None):
+        """
+        Defaults, overlaid with a JSON file of the form
+        {"tiers": {name: model}, "default_tier": name, "tools": {tool: tier}, "endpoints": {endpoint: tier | {tool: tier}}}.
+        Tiers, tools and endpoints are merged into the defaults key by key.
+        """
+        config = {}
+        if path:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+        return cls(
+            tiers={**DEFAULT_TIERS, **config.get("tiers", {})},
+            default_tier=config.get("default_tier", DEFAULT_TIER),
+            tools={**DEFAULT_TOOL_TIERS, **config.get("tools", {})},
+            endpoints={**DEFAULT_ENDPOINT_TIERS, **config.get("endpoints", {})},
+        )
+
+    def tier_for(self, tool_name, endpoint=None):
+        rule = self.endpoints.get(endpoint)
+        if isinstance(rule, dict) and tool_name in rule:
+            return rule[tool_name]
+        if isinstance(rule, str):
+            return rule
+        return self.tools.get(tool_name, self.default_tier)
+
+    def route(self, tool_name, endpoint=None):
+        """Returns (tier, model) for a call to `tool_name` made while serving `endpoint`."""
+        tier = self.tier_for(tool_name, endpoint)
+        return tier, self.tiers[tier]
+
+    def tier_of(self, model):
+        return self._tier_of_model.get(model)
+
+    def table(self):
+        return {"tiers": self.tiers, "default_tier": self.default_tier, "tools": self.tools, "endpoints": self.endpoints}
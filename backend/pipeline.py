@@ -0,0 +1,99 @@
+# backend/pipeline.py
+import asyncio
+import inspect
+import logging
+import time
+
+logger = logging.getLogger("brainstorm.pipeline")
+
+
+class Stage:
+    """A node in the brainstorm DAG. `fn` receives the dict of finished stage outputs and may be async."""
+
+    def __init__(self, name, fn, deps=()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+async def gather_bounded(fn, items, limit=8):
+    """Awaits fn(item) for every item with at most `limit` in flight; results keep input order."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _run(item):
+        async with semaphore:
+            return await fn(item)
+
+    return await asyncio.gather(*(_run(item) for item in items))
+
+
+async def run_stages(stages, max_concurrency=8):
+    """
+    Runs stages as a dependency graph, starting every stage as soon as all of its
+    dependencies have finished. A failed stage marks everything downstream of it as
+    skipped instead of aborting independent branches.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    results, errors, timings, skipped = {}, {}, {}, []
+    pending = dict(by_name)
+    running = {}
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    started_at = time.perf_counter()
+
+    async def _timed(stage, inputs):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = stage.fn(inputs)
+                if inspect.isawaitable(result):
+                    result = await result
+                return result
+            finally:
+                timings[stage.name] = {
+                    'started': round(start - started_at, 3),
+                    'seconds': round(time.perf_counter() - start, 3),
+                }
+
+    try:
+        while pending or running:
+            # Drop stages whose upstream failed; they can never run.
+            for name, stage in list(pending.items()):
+                if any(dep in errors or dep in skipped for dep in stage.deps):
+                    skipped.append(name)
+                    del pending[name]
+
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.deps):
+                    running[asyncio.ensure_future(_timed(stage, dict(results)))] = name
+                    del pending[name]
+
+            if not running:
+                # Nothing runnable and nothing in flight: remaining stages are blocked.
+                skipped.extend(pending)
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                try:
+                    results[name] = task.result()
+                except Exception as e:
+                    logger.error(f"Pipeline stage '{name}' failed: {e}")
+                    errors[name] = str(e)
+    finally:
+        # If the caller goes away mid-run, don't leave orphaned Claude calls behind
+        for task in running:
+            task.cancel()
+
+    return {
+        'results': results,
+        'errors': errors,
+        'skipped': skipped,
+        'timings': timings,
+        'total_seconds': round(time.perf_counter() - started_at, 3),
+    }
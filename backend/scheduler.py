@@ -0,0 +1,219 @@
+# backend/scheduler.py
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import random
+import time
+
+# Lower value = served first. Interactive calls are single steps a user is waiting on;
+# bulk calls are fan-outs (variant scoring, research and debate rounds, whole pipelines);
+# speculative calls are prefetches nobody has asked for yet.
+INTERACTIVE = 0
+BULK = 1
+SPECULATIVE = 2
+call_priority = contextvars.ContextVar("call_priority", default=INTERACTIVE)
+# Promotion the current task's calls are queued under, if their priority can still be raised
+call_promotion = contextvars.ContextVar("call_promotion", default=None)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+@contextlib.contextmanager
+def priority(level):
+    """Runs the enclosed calls (and any tasks they spawn) at `level`, unless they already run at a lower priority."""
+    token = call_priority.set(max(level, call_priority.get()))
+    try:
+        yield
+    finally:
+        call_priority.reset(token)
+
+
+class Promotion:
+    """
+    A priority that can be raised after calls were queued at it, e.g. a prefetch the user
+    has just asked for that is still waiting behind bulk work. Calls made with it set as
+    call_promotion are queued at its level, and move up when it is raised.
+    """
+
+    def __init__(self, level):
+        self.level = level
+        self._queued = []  # (CallScheduler, heap entry) of calls still waiting
+
+    def raise_to(self, level):
+        if level >= self.level:
+            return
+        self.level = level
+        for scheduler, entry in list(self._queued):
+            scheduler._reprioritize(entry, level)
+
+
+class TokenBucket:
+    """Refills continuously at `rate_per_minute`; holds at most one minute's worth. A rate of 0 means unlimited."""
+
+    def __init__(self, rate_per_minute):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        # A request bigger than the bucket only has to wait for a full bucket
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount, now):
+        if self.rate:
+            self._refill(now)
+            self.level -= amount
+
+    def adjust(self, delta):
+        # Settles an estimate against actual usage; may go negative, which delays later calls
+        if self.rate:
+            self.level = min(self.capacity, self.level - delta)
+
+
+def retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            return float(value) * scale
+        except ValueError:
+            return None
+    return None
+
+
+def is_retryable(error):
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # Connection errors and timeouts carry no status
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+class CallScheduler:
+    """
+    Central gate for Claude calls. Each call waits for a request and its estimated tokens
+    from per-minute token buckets, with waiting calls served in (priority, arrival) order.
+    Failed calls are retried with full-jitter exponential backoff, or after the server's
+    retry-after. A 429/529 pauses every caller, not just the one that hit it.
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_retries=4, base_delay=1.0, max_delay=60.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._waiters = []  # heap of [priority, seq]
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._loop = None
+        self._changed = None
+
+    def _changed_event(self):
+        # asyncio primitives bind to one loop; rebuild if the app is served from a new one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._changed = loop, asyncio.Event()
+        return self._changed
+
+    def _notify(self):
+        # Wakes everyone waiting on the current event; later waiters get a fresh one
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    def _reprioritize(self, entry, level):
+        if entry[0] > level and entry in self._waiters:
+            entry[0] = level
+            heapq.heapify(self._waiters)
+            self._notify()
+
+    async def acquire(self, estimated_tokens=0, level=None):
+        level = call_priority.get() if level is None else level
+        promotion = call_promotion.get()
+        if promotion is not None:
+            level = min(level, promotion.level)
+        entry = [level, next(self._seq)]
+        heapq.heappush(self._waiters, entry)
+        if promotion is not None:
+            promotion._queued.append((self, entry))
+        try:
+            while True:
+                changed = self._changed_event()
+                now = time.monotonic()
+                wait = max(0.0, self._paused_until - now)
+                if self._waiters[0] is entry:
+                    wait = max(wait, self.requests.wait_time(1, now), self.tokens.wait_time(estimated_tokens, now))
+                    if wait <= 0:
+                        heapq.heappop(self._waiters)
+                        self.requests.take(1, now)
+                        self.tokens.take(estimated_tokens, now)
+                        self._notify()
+                        return
+                try:
+                    # Woken early when the head of the queue changes or a pause is set
+                    await asyncio.wait_for(changed.wait(), timeout=wait or None)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._notify()
+            raise
+        finally:
+            if promotion is not None:
+                promotion._queued.remove((self, entry))
+
+    def settle(self, estimated_tokens, actual_tokens):
+        self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def retry_delay(self, error, attempt):
+        """Seconds to wait before retry number `attempt + 1`, or None if the error shouldn't be retried."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, self.base_delay)
+        if getattr(error, "status_code", None) in (429, 529):
+            # Everyone backs off together instead of piling onto a limit that was just hit
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._notify()
+        return delay
+
+    async def run(self, call, estimated_tokens=0, on_retry=None):
+        """
+        Awaits `call()` under the scheduler, retrying retryable errors. Returns
+        (result, retries). `on_retry(error, attempt, delay)` is called before each retry.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(estimated_tokens)
+            try:
+                return await call(), attempt
+            except Exception as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None:
+                    e.retries_taken = attempt
+                    raise
+                # The retry takes its own estimate, so the failed attempt's is handed back
+                self.settle(estimated_tokens, 0)
+                if on_retry is not None:
+                    on_retry(e, attempt, delay)
+                attempt += 1
+                await asyncio.sleep(delay)
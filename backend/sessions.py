@@ -0,0 +1,132 @@
+# backend/sessions.py
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class SessionNotFound(KeyError):
+    pass
+
+
+class InMemorySessionStore:
+    """Keeps each session's stage outputs in process. The least recently used sessions are dropped past `max_sessions`."""
+
+    def __init__(self, max_sessions=1000):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # session_id -> {'created_at', 'updated_at', 'stages': {stage: value}}
+        self._lock = threading.Lock()
+
+    def create(self):
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = {'created_at': now, 'updated_at': now, 'stages': {}}
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session_id
+
+    def exists(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def set_stage(self, session_id, stage, value):
+        # Stored as JSON so later readers never share mutable state with the writer
+        serialized = json.dumps(value)
+        with self._lock:
+            session = self._get(session_id)
+            session['stages'][stage] = serialized
+            session['updated_at'] = time.time()
+
+    def get_stage(self, session_id, stage):
+        with self._lock:
+            serialized = self._get(session_id)['stages'].get(stage)
+        return json.loads(serialized) if serialized is not None else None
+
+    def get_stages(self, session_id):
+        with self._lock:
+            stages = dict(self._get(session_id)['stages'])
+        return {stage: json.loads(serialized) for stage, serialized in stages.items()}
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _get(self, session_id):
+        # Caller holds the lock
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFound(session_id)
+        self._sessions.move_to_end(session_id)
+        return session
+
+
+class SQLiteSessionStore:
+    """Same interface as InMemorySessionStore, persisted to a SQLite file so sessions survive restarts."""
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, created_at REAL, updated_at REAL)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS session_stages ("
+                "session_id TEXT, stage TEXT, value TEXT, updated_at REAL, PRIMARY KEY (session_id, stage))"
+            )
+            self._db.commit()
+
+    def create(self):
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT INTO sessions (id, created_at, updated_at) VALUES (?, ?, ?)", (session_id, now, now))
+            self._db.commit()
+        return session_id
+
+    def exists(self, session_id):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is not None
+
+    def set_stage(self, session_id, stage, value):
+        now = time.time()
+        with self._lock:
+            self._require(session_id)
+            self._db.execute(
+                "INSERT OR REPLACE INTO session_stages (session_id, stage, value, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, stage, json.dumps(value), now)
+            )
+            self._db.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id))
+            self._db.commit()
+
+    def get_stage(self, session_id, stage):
+        with self._lock:
+            self._require(session_id)
+            row = self._db.execute(
+                "SELECT value FROM session_stages WHERE session_id = ? AND stage = ?", (session_id, stage)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def get_stages(self, session_id):
+        with self._lock:
+            self._require(session_id)
+            rows = self._db.execute("SELECT stage, value FROM session_stages WHERE session_id = ?", (session_id,)).fetchall()
+        return {stage: json.loads(value) for stage, value in rows}
+
+    def delete(self, session_id):
+        with self._lock:
+            self._db.execute("DELETE FROM session_stages WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._db.commit()
+
+    def _require(self, session_id):
+        # Caller holds the lock
+        if self._db.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is None:
+            raise SessionNotFound(session_id)
+
+
+def create_session_store(sqlite_path=None, max_sessions=1000):
+    if sqlite_path:
+        return SQLiteSessionStore(sqlite_path)
+    return InMemorySessionStore(max_sessions=max_sessions)
@@ -0,0 +1,100 @@
+# backend/similarity.py
+import hashlib
+import re
+
+# Words that make two unrelated sentences look alike
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could for from has have how if in into is it its more most
+of on or our so than that the their them there these they this to too was we were what when which
+who will with would you your
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokens(text):
+    """Lowercased words of `text` without stopwords."""
+    return [word for word in _WORD.findall(str(text).lower()) if word not in STOPWORDS]
+
+
+def token_set(text):
+    return frozenset(tokens(text))
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def novelty(new_texts, earlier_texts):
+    """
+    Share of new material in `new_texts` compared with `earlier_texts`: for each new text,
+    1 minus its highest token-set Jaccard similarity with any earlier text, averaged.
+    Returns 1.0 when there is nothing earlier to compare against.
+    """
+    new_sets = [token_set(text) for text in new_texts]
+    new_sets = [s for s in new_sets if s]
+    earlier_sets = [s for s in (token_set(text) for text in earlier_texts) if s]
+    if not new_sets:
+        return 0.0
+    if not earlier_sets:
+        return 1.0
+    return sum(1 - max(jaccard(new, earlier) for earlier in earlier_sets) for new in new_sets) / len(new_sets)
+
+
+class MinHasher:
+    """
+    MinHash signatures over token or shingle sets: the share of equal positions in two
+    signatures estimates the Jaccard similarity of the sets, so each text is hashed once
+    and pairs are compared as fixed-size tuples.
+    """
+
+    _PRIME = (1 << 61) - 1
+
+    def __init__(self, num_perm=128, seed=1):
+        self.num_perm = num_perm
+        # Deterministic (a, b) pairs for the universal hashes h(x) = (a * x + b) mod p
+        self._params = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(f"{seed}:{i}".encode("utf-8"), digest_size=16).digest()
+            self._params.append((int.from_bytes(digest[:8], "big") % (self._PRIME - 1) + 1,
+                                 int.from_bytes(digest[8:], "big") % self._PRIME))
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return (self._PRIME,) * self.num_perm
+        values = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingle_set]
+        return tuple(min((a * value + b) % self._PRIME for value in values) for a, b in self._params)
+
+    @staticmethod
+    def similarity(signature_a, signature_b):
+        return sum(x == y for x, y in zip(signature_a, signature_b)) / len(signature_a)
+
+
+def cluster_near_duplicates(texts, threshold=0.7, hasher=None):
+    """
+    Groups texts whose estimated token-set Jaccard similarity is at least `threshold`
+    (transitively). Returns lists of indices in input order; each list starts with the
+    earliest text of its group, which callers use as the representative.
+    """
+    hasher = hasher or MinHasher()
+    sets = [token_set(text) for text in texts]
+    signatures = [hasher.signature(words) for words in sets]
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            # Texts without any words are never grouped
+            if sets[i] and sets[j] and find(i) != find(j) and hasher.similarity(signatures[i], signatures[j]) >= threshold:
+                parent[max(find(i), find(j))] = min(find(i), find(j))
+    clusters = {}
+    for i in range(len(texts)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
@@ -0,0 +1,185 @@
+# backend/speculation.py
+import asyncio
+import contextvars
+import copy
+import logging
+
+from llm_cache import make_cache_key
+from scheduler import SPECULATIVE, Promotion, call_priority, call_promotion
+from sessions import SessionNotFound
+
+logger = logging.getLogger("brainstorm.speculation")
+
+# Session ID of the prefetch the current task is running, for budget checks and charging
+speculating = contextvars.ContextVar("speculating", default=None)
+
+SETTINGS_STAGE = "speculation"  # opt-in, token budget and counters
+PREFETCHED_STAGE = "prefetched"  # {stage: {"inputs_hash", "value"}} for finished prefetches
+
+
+class SpeculationBudgetExceeded(RuntimeError):
+    pass
+
+
+class Prefetcher:
+    """
+    Runs the likely next stage of an opted-in session in the background while the user is
+    still reading the previous one. A prefetch is keyed by a hash of its inputs: when the
+    real request arrives with the same inputs it gets the prefetched output (waiting for
+    it if it is still running, at its own priority); with other inputs the prefetch is
+    cancelled or thrown away. Model tokens spent on a session's prefetches are capped by
+    its `budget_tokens`.
+    """
+
+    def __init__(self, session_store, default_budget_tokens=100000):
+        self.sessions = session_store
+        self.default_budget_tokens = default_budget_tokens
+        self._tasks = {}  # (session_id, stage) -> (inputs_hash, asyncio.Task, Promotion)
+
+    def enable(self, session_id, budget_tokens=None):
+        self.sessions.set_stage(session_id, SETTINGS_STAGE, {
+            'enabled': True, 'budget_tokens': budget_tokens or self.default_budget_tokens, 'spent_tokens': 0,
+            'started': 0, 'served': 0, 'discarded': 0, 'over_budget': 0,
+        })
+
+    def enabled(self, session_id):
+        return bool(session_id) and bool(self._settings(session_id).get('enabled'))
+
+    def _settings(self, session_id):
+        return self.sessions.get_stage(session_id, SETTINGS_STAGE) or {}
+
+    def _count(self, session_id, **increments):
+        # Read-modify-write without an await in between, like update_session_stage
+        try:
+            settings = self._settings(session_id)
+            for name, amount in increments.items():
+                settings[name] = settings.get(name, 0) + amount
+            self.sessions.set_stage(session_id, SETTINGS_STAGE, settings)
+        except SessionNotFound:
+            pass
+
+    def _over_budget(self, settings):
+        return settings.get('spent_tokens', 0) >= settings.get('budget_tokens', 0)
+
+    def check_budget(self):
+        """Raises SpeculationBudgetExceeded inside a prefetch whose session has spent its budget."""
+        session_id = speculating.get()
+        if session_id is not None and self._over_budget(self._settings(session_id)):
+            raise SpeculationBudgetExceeded(f"Speculation budget spent for session {session_id}")
+
+    def charge(self, tokens):
+        session_id = speculating.get()
+        if session_id is not None:
+            self._count(session_id, spent_tokens=tokens)
+
+    def start(self, session_id, stage, inputs, compute):
+        """Starts compute(*inputs) in the background unless the same prefetch exists already. Returns True if started."""
+        if not self.enabled(session_id):
+            return False
+        settings = self._settings(session_id)
+        inputs_hash = make_cache_key(stage=stage, inputs=inputs)
+        running = self._tasks.get((session_id, stage))
+        prefetched = (self.sessions.get_stage(session_id, PREFETCHED_STAGE) or {}).get(stage)
+        if (running and running[0] == inputs_hash) or (prefetched and prefetched['inputs_hash'] == inputs_hash):
+            return False
+        self._discard(session_id, stage)  # An older guess made from other inputs
+        if self._over_budget(settings):
+            self._count(session_id, over_budget=1)
+            return False
+
+        # A fresh context rather than a copy of the triggering request's, so the prefetch's
+        # calls aren't labelled or routed as that endpoint's (nor counted in its job)
+        promotion = Promotion(SPECULATIVE)
+        context = contextvars.Context()
+        context.run(self._enter, session_id, promotion)
+        task = asyncio.get_running_loop().create_task(self._run(session_id, stage, inputs_hash, compute, inputs), context=context)
+        self._tasks[(session_id, stage)] = (inputs_hash, task, promotion)
+        self._count(session_id, started=1)
+        return True
+
+    def _enter(self, session_id, promotion):
+        speculating.set(session_id)
+        call_priority.set(SPECULATIVE)
+        call_promotion.set(promotion)
+
+    async def _run(self, session_id, stage, inputs_hash, compute, inputs):
+        try:
+            value = await compute(*inputs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"Prefetch of {stage} for session {session_id} stopped: {e}")
+            return None
+        finally:
+            # Still registered unless a request has claimed it meanwhile
+            unclaimed = self._tasks.get((session_id, stage), (None, None))[1] is asyncio.current_task()
+            if unclaimed:
+                del self._tasks[(session_id, stage)]
+        if unclaimed:
+            try:
+                prefetched = self.sessions.get_stage(session_id, PREFETCHED_STAGE) or {}
+                prefetched[stage] = {'inputs_hash': inputs_hash, 'value': value}
+                self.sessions.set_stage(session_id, PREFETCHED_STAGE, prefetched)
+            except SessionNotFound:
+                pass
+        return value
+
+    def _hand_out(self, session_id, stage, inputs):
+        # Removes a prefetch of `stage` made from `inputs` and returns (True, running task or
+        # None, stored entry or None); discards one made from other inputs and returns False.
+        # A prefetch is served once: asking again with the same inputs computes afresh.
+        if not self.enabled(session_id):
+            return False, None, None
+        inputs_hash = make_cache_key(stage=stage, inputs=inputs)
+        running = self._tasks.get((session_id, stage))
+        prefetched = self.sessions.get_stage(session_id, PREFETCHED_STAGE) or {}
+        entry = prefetched.get(stage)
+        if running and running[0] == inputs_hash:
+            del self._tasks[(session_id, stage)]
+            # Someone is waiting on it now: its queued calls move up to the caller's priority
+            running[2].raise_to(call_priority.get())
+            self._count(session_id, served=1)
+            return True, running[1], None
+        if entry and entry['inputs_hash'] == inputs_hash:
+            del prefetched[stage]
+            self.sessions.set_stage(session_id, PREFETCHED_STAGE, prefetched)
+            self._count(session_id, served=1)
+            return True, None, entry
+        self._discard(session_id, stage)
+        return False, None, None
+
+    def claim(self, session_id, stage, inputs):
+        """
+        Settles the prefetch of `stage` against the inputs the user actually chose: returns
+        True (once) if it was made from the same inputs and discards it otherwise. Use take()
+        to also get its output; claim() suits prefetches that are served through the response
+        cache rather than handed back whole.
+        """
+        return self._hand_out(session_id, stage, inputs)[0]
+
+    async def take(self, session_id, stage, inputs):
+        """Returns (True, output) of a prefetch made from `inputs`, or (False, None) after discarding any other."""
+        served, task, entry = self._hand_out(session_id, stage, inputs)
+        if task is not None:
+            # Shielded: if this request goes away the prefetch still finishes and fills the response cache
+            try:
+                value = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+                return False, None
+            return value is not None, copy.deepcopy(value)
+        return served, entry['value'] if entry else None
+
+    def _discard(self, session_id, stage):
+        running = self._tasks.pop((session_id, stage), None)
+        if running is not None:
+            running[1].cancel()
+            self._count(session_id, discarded=1)
+        try:
+            prefetched = self.sessions.get_stage(session_id, PREFETCHED_STAGE) or {}
+            if prefetched.pop(stage, None) is not None:
+                self.sessions.set_stage(session_id, PREFETCHED_STAGE, prefetched)
+                self._count(session_id, discarded=1)
+        except SessionNotFound:
+            pass
@@ -0,0 +1,75 @@
+# backend/streaming.py
+import json
+import re
+
+_JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+def format_sse(event, data):
+    """Formats one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class JsonStringFieldStream:
+    """
+    Incrementally decodes one top-level string field out of streamed tool-input JSON.
+
+    Claude streams tool arguments as `input_json_delta` fragments of a JSON object; feed
+    each fragment in and get back whatever new text of `field` it completes. Escape
+    sequences split across fragments are held back until they are complete.
+    """
+
+    def __init__(self, field):
+        self._field_start = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ''
+        self._state = 'seek'  # seek -> string -> done
+
+    @property
+    def done(self):
+        return self._state == 'done'
+
+    def feed(self, fragment):
+        self._buffer += fragment
+        if self._state == 'seek':
+            match = self._field_start.search(self._buffer)
+            if not match:
+                return ''
+            self._buffer = self._buffer[match.end():]
+            self._state = 'string'
+        if self._state != 'string':
+            return ''
+
+        buf, out, i = self._buffer, [], 0
+        while i < len(buf):
+            char = buf[i]
+            if char == '"':
+                self._state = 'done'
+                i += 1
+                break
+            if char != '\\':
+                out.append(char)
+                i += 1
+                continue
+            if i + 1 >= len(buf):
+                break
+            escape = buf[i + 1]
+            if escape != 'u':
+                out.append(_JSON_ESCAPES.get(escape, escape))
+                i += 2
+                continue
+            if i + 6 > len(buf):
+                break
+            code = int(buf[i + 2:i + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                # High surrogate: wait for its low half so emoji aren't split
+                if i + 12 > len(buf):
+                    break
+                if buf[i + 6:i + 8] == '\\u':
+                    low = int(buf[i + 8:i + 12], 16)
+                    out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                    continue
+            out.append(chr(code))
+            i += 6
+        self._buffer = buf[i:]
+        return ''.join(out)
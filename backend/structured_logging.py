@@ -0,0 +1,107 @@
+# backend/structured_logging.py
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+
+# Attributes every LogRecord has; anything else on a record came in through `extra=`
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_settings = {"sample_rate": 0.01, "payload_max_chars": 4000}
+_listener = None
+
+
+def truncate(text, max_chars):
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}…[{len(text) - max_chars} more chars]"
+
+
+def _jsonable(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+
+def sample_payload(value):
+    """
+    Returns `value` as truncated JSON for roughly `sample_rate` of calls and None otherwise.
+    Serialization only happens for sampled calls, so unsampled requests pay nothing for it.
+    """
+    if random.random() >= _settings["sample_rate"]:
+        return None
+    return truncate(json.dumps(value, default=_jsonable, ensure_ascii=False), _settings["payload_max_chars"])
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any `extra=` fields."""
+
+    def __init__(self, field_max_chars=2000):
+        super().__init__()
+        self.field_max_chars = field_max_chars
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.getMessage(), self.field_max_chars),
+        }
+        for key, value in record.__dict__.items():
+            if key in _STANDARD_ATTRS or key.startswith("_") or value is None:
+                continue
+            # Payloads were already truncated to their own limit when they were sampled
+            entry[key] = truncate(value, self.field_max_chars) if isinstance(value, str) and key != "payload" else value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=_jsonable, ensure_ascii=False)
+
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The stock prepare() flattens the record into a preformatted string; keep the extra
+        # fields for the JSON formatter and only resolve what can't safely cross threads.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def configure_logging(logger_name="brainstorm", level="INFO", stream=None, sample_rate=0.01, payload_max_chars=4000, field_max_chars=2000):
+    """
+    Routes `logger_name` (and its children) through an in-memory queue to a background
+    thread that formats JSON lines and writes them to `stream` (stderr by default), so the
+    event loop never waits on console I/O. Safe to call more than once.
+    """
+    global _listener
+    _settings.update(sample_rate=sample_rate, payload_max_chars=payload_max_chars)
+    if _listener is not None:
+        _listener.stop()
+    else:
+        atexit.register(_stop_listener)  # Drain what's queued on shutdown
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter(field_max_chars))
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+    logger = logging.getLogger(logger_name)
+    logger.handlers = [_RecordQueueHandler(log_queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,104 @@
+# backend/templates.py
+import hashlib
+import json
+import re
+
+from compaction import estimate_tokens
+
+# {{field}} rather than str.format/$field: the prompts are full of JSON braces and prices
+_FIELD = re.compile(r"\{\{(\w+)\}\}")
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class CompiledTools:
+    """
+    A tool list prepared once at startup: `schema` is the list sent to the API (with the last
+    tool marked for prompt caching when `cache_prefix` is set), and `hash`/`tokens` stand in
+    for it in cache keys and rate-limit estimates so requests don't re-serialize it.
+    """
+
+    def __init__(self, tools, cache_prefix=False, version=1):
+        self.source = tools
+        self.schema = tools[:-1] + [dict(tools[-1], cache_control=CACHE_CONTROL)] if cache_prefix else list(tools)
+        self.names = tuple(tool["name"] for tool in tools)
+        self.version = version
+        serialized = json.dumps(self.schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        self.hash = _digest(f"{version}:{serialized}")
+        self.tokens = estimate_tokens(serialized)
+
+
+class PromptTemplate:
+    """
+    A prompt with {{field}} placeholders, split into its static fragments once so rendering
+    is a single join. `version` is bumped by hand to invalidate cached outputs when the
+    meaning of a prompt changes without its text changing (e.g. how its output is used).
+    """
+
+    def __init__(self, name, text, version=1):
+        self.name = name
+        self.version = version
+        self.hash = _digest(f"{version}:{text}")
+        pieces = _FIELD.split(text)
+        self._static = pieces[0::2]
+        self.fields = tuple(pieces[1::2])
+
+    def render(self, **values):
+        missing = set(self.fields) - set(values)
+        if missing:
+            raise KeyError(f"Prompt '{self.name}' is missing fields: {sorted(missing)}")
+        parts = [self._static[0]]
+        for field, static in zip(self.fields, self._static[1:]):
+            parts.append(str(values[field]))
+            parts.append(static)
+        return "".join(parts)
+
+
+class TemplateRegistry:
+    """Tool schemas and prompt templates by name, with the versions that go into cache keys."""
+
+    def __init__(self):
+        self._tools = {}  # tool name -> CompiledTools
+        self._prompts = {}  # prompt name -> PromptTemplate
+        self._prompt_tools = {}  # tool name -> [prompt names]
+
+    def add_tools(self, tools, cache_prefix=False, version=1):
+        compiled = CompiledTools(tools, cache_prefix, version)
+        for name in compiled.names:
+            if name in self._tools:
+                raise ValueError(f"Tool '{name}' is already registered")
+            self._tools[name] = compiled
+        return compiled
+
+    def add_prompt(self, name, text, tools=None, version=1):
+        """Registers a prompt used with `tools` (tool names; defaults to `name`)."""
+        if name in self._prompts:
+            raise ValueError(f"Prompt '{name}' is already registered")
+        template = self._prompts[name] = PromptTemplate(name, text, version)
+        for tool_name in tools or (name,):
+            self._prompt_tools.setdefault(tool_name, []).append(name)
+        return template
+
+    def prompt(self, name):
+        return self._prompts[name]
+
+    def tools_for(self, tool_name, tool_schema):
+        # Registered schemas are reused; anything else (ad hoc lists) is compiled per call
+        compiled = self._tools.get(tool_name)
+        if compiled is not None and compiled.source is tool_schema:
+            return compiled
+        return CompiledTools(tool_schema)
+
+    def version_of(self, tool_name):
+        # Versions of the prompts used with a tool, for cache keys
+        return ",".join(f"{name}@{self._prompts[name].version}" for name in self._prompt_tools.get(tool_name, []))
+
+    def manifest(self):
+        return {
+            "tools": {name: {"hash": compiled.hash, "version": compiled.version} for name, compiled in self._tools.items()},
+            "prompts": {name: {"hash": template.hash, "version": template.version, "fields": list(template.fields)}
+                        for name, template in self._prompts.items()},
+        }
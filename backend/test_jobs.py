@@ -0,0 +1,33 @@
+# backend/test_jobs.py
+import asyncio
+
+from jobs import FINISHED, SUCCEEDED, InMemoryJobStore, JobQueue
+
+
+def test_events_sees_a_job_finished_while_the_consumer_is_busy():
+    release = asyncio.Event()
+
+    async def run_job(job):
+        await release.wait()
+        return 200, {'ok': True}
+
+    async def main():
+        queue = JobQueue(InMemoryJobStore(), run_job, workers=1)
+        await queue.start()
+        try:
+            job = queue.submit('test', {})
+            events = queue.events(job['id'], poll_interval=60)
+            seen = [await anext(events)]
+            # The job starts and finishes between the first yield and the next wait()
+            release.set()
+            while queue.get(job['id'])['status'] not in FINISHED:
+                await asyncio.sleep(0)
+            async for update in events:
+                seen.append(update)
+            return seen
+        finally:
+            await queue.stop()
+
+    seen = asyncio.run(asyncio.wait_for(main(), 5))
+    assert seen[-1]['status'] == SUCCEEDED
+    assert seen[-1]['result'] == {'ok': True}
@@ -0,0 +1,49 @@
+# backend/test_speculation.py
+import asyncio
+
+from sessions import InMemorySessionStore
+from speculation import PREFETCHED_STAGE, SETTINGS_STAGE, Prefetcher
+
+
+def make_prefetcher():
+    sessions = InMemorySessionStore()
+    prefetcher = Prefetcher(sessions)
+    session_id = sessions.create()
+    prefetcher.enable(session_id)
+    return sessions, prefetcher, session_id
+
+
+async def compute(value):
+    await asyncio.sleep(0)
+    return {'value': value}
+
+
+def test_a_finished_prefetch_is_served_once_and_a_rerun_computes_afresh():
+    sessions, prefetcher, session_id = make_prefetcher()
+
+    async def main():
+        prefetcher.start(session_id, 'core_problem', ('a',), compute)
+        await asyncio.sleep(0.01)  # Finishes and is stored before the user asks for it
+        first = await prefetcher.take(session_id, 'core_problem', ('a',))
+        rerun = await prefetcher.take(session_id, 'core_problem', ('a',))
+        return first, rerun
+
+    first, rerun = asyncio.run(main())
+    assert first == (True, {'value': 'a'})
+    assert rerun == (False, None)
+    assert not (sessions.get_stage(session_id, PREFETCHED_STAGE) or {}).get('core_problem')
+    assert sessions.get_stage(session_id, SETTINGS_STAGE)['served'] == 1
+
+
+def test_a_running_prefetch_is_claimed_once_and_not_stored_afterwards():
+    sessions, prefetcher, session_id = make_prefetcher()
+
+    async def main():
+        prefetcher.start(session_id, 'research', ('a',), compute)
+        claims = [prefetcher.claim(session_id, 'research', ('a',)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        return claims
+
+    assert asyncio.run(main()) == [True, False, False]
+    assert not (sessions.get_stage(session_id, PREFETCHED_STAGE) or {}).get('research')
+    assert sessions.get_stage(session_id, SETTINGS_STAGE)['served'] == 1
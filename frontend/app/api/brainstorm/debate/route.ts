@@ -5,7 +5,7 @@ const PYTHON_BACKEND_URL = process.env.PYTHON_BACKEND_URL || "http://127.0.0.1:5
 
 // Define expected request body structures
 interface DebateRequestBody {
-    action: 'get_available_roles' | 'run_debate_round' | 'summarize_debate';
+    action: 'get_available_roles' | 'run_debate_round' | 'run_debate' | 'summarize_debate';
     payload?: any; // Define more specific types based on action if needed
 }
 
@@ -51,6 +51,15 @@ export async function POST(request: NextRequest) {
                 backendPayload = debatePayload;
                 break;
 
+            case 'run_debate':
+                endpoint = '/debate/run';
+                // Runs every round server-side with the roles of each round in parallel
+                if (!payload || !payload.selected_idea || !payload.research_summary) {
+                    return NextResponse.json({ error: 'Invalid payload for run_debate action' }, { status: 400 });
+                }
+                backendPayload = payload;
+                break;
+
             case 'summarize_debate':
                 endpoint = '/debate/summarize';
                 if (!payload || !payload.debate_log) {
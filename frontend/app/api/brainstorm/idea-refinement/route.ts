@@ -5,7 +5,7 @@ const PYTHON_BACKEND_URL = process.env.PYTHON_BACKEND_URL || "http://127.0.0.1:5
 
 // Define expected request body structures (optional but good practice)
 interface RefinementRequestBody {
-    action: 'get_themes' | 'get_context' | 'get_clarification' | 'get_pushback' | 'get_core_problem' | 'get_creative_expansion' | 'get_cross_analogs' | 'get_variant_pushback' | 'get_variant_feasibility';
+    action: 'get_themes' | 'get_context' | 'get_clarification' | 'get_pushback' | 'get_core_problem' | 'get_creative_expansion' | 'get_cross_analogs' | 'get_variant_pushback' | 'get_variant_feasibility' | 'evaluate_variants';
     payload: any; // Define more specific types based on action if needed
 }
 
@@ -131,6 +131,11 @@ export async function POST(request: Request) {
                 endpoint = '/refine/variant_feasibility';
                 backendPayload = { idea_variant: payload.idea_variant, variant_context: payload.variant_context };
                 break;
+            case 'evaluate_variants':
+                endpoint = '/refine/variants/evaluate';
+                // Passed through whole: max_concurrency, dedup_threshold, feasibility_batch_size, session_id, ...
+                backendPayload = payload;
+                break;
             default:
                 return NextResponse.json({ error: 'Invalid action specified' }, { status: 400 });
         }
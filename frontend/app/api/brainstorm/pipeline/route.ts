@@ -0,0 +1,20 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+const PYTHON_BACKEND_URL = process.env.PYTHON_BACKEND_URL || "http://127.0.0.1:5000/api/brainstorm";
+
+export async function POST(request: NextRequest) {
+  try {
+    const body = await request.json();
+    const backendUrl = `${PYTHON_BACKEND_URL}/pipeline/run`;
+    const response = await fetch(backendUrl, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(body)
+    });
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error || 'Backend error');
+    return NextResponse.json(data);
+  } catch (error: any) {
+    return NextResponse.json({ error: error.message || 'Unknown error' }, { status: 500 });
+  }
+}
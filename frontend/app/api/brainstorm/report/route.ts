@@ -5,10 +5,11 @@ const PYTHON_BACKEND_URL = process.env.PYTHON_BACKEND_URL || "http://127.0.0.1:5
 
 // Define expected request body structures
 interface ReportRequestBody {
-    action: 'generate_section' | 'generate_full_report'; // Updated actions
+    action: 'generate_section' | 'generate_full_report' | 'stream_full_report'; // Updated actions
     payload: {
         combinedContext: any; // The full context object
         section_title?: string; // Optional for section generation
+        [field: string]: any; // Anything else (session_id, mode, ...) is passed through to the backend
     };
 }
 
@@ -19,6 +20,26 @@ export async function POST(request: NextRequest) {
 
         console.log('Received payload in report API route:', payload); // <-- Add logging here
 
+        // The full-report endpoints take the payload as sent, with the context in snake_case
+        const { combinedContext, ...passThrough } = payload;
+        const fullReportPayload = { ...passThrough, combined_context: combinedContext ?? passThrough.combined_context };
+
+        // Streaming reports are piped straight through as Server-Sent Events
+        if (action === 'stream_full_report') {
+            const streamResponse = await fetch(`${PYTHON_BACKEND_URL}/report/generate_full/stream`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(fullReportPayload),
+            });
+            if (!streamResponse.ok || !streamResponse.body) {
+                const errorText = await streamResponse.text();
+                throw new Error(`Backend request failed for action "${action}" with status ${streamResponse.status}: ${errorText}`);
+            }
+            return new Response(streamResponse.body, {
+                headers: { 'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache' },
+            });
+        }
+
         let endpoint = '';
         let backendPayload: any = {};
 
@@ -33,10 +54,7 @@ export async function POST(request: NextRequest) {
                 break;
             case 'generate_full_report':
                 endpoint = '/report/generate_full';
-                // Convert camelCase to snake_case for backend
-                backendPayload = {
-                    combined_context: payload.combinedContext
-                };
+                backendPayload = fullReportPayload;
                 break;
             default:
                 // Type safety: If action is not valid, it's an error
@@ -5,7 +5,7 @@ const PYTHON_BACKEND_URL = process.env.PYTHON_BACKEND_URL || "http://127.0.0.1:5
 
 // Define expected request body structure
 interface ResearchRequestBody {
-    action: 'run_agent' | 'get_summary';
+    action: 'run_agent' | 'run_round' | 'run_all' | 'get_summary';
     payload: any; // Define more specific types based on action if needed
 }
 
@@ -24,6 +24,16 @@ export async function POST(req: NextRequest) {
                 // Payload for run_agent should contain: selected_idea, agent_name, combined_context, round_num
                 backendPayload = payload; // Forward the payload directly
                 break;
+            case 'run_round':
+                endpoint = '/research/round';
+                // Payload for run_round should contain: selected_idea, combined_context, round_num, and optionally research_agents, previous_insights
+                backendPayload = payload;
+                break;
+            case 'run_all':
+                endpoint = '/research/run';
+                // Payload for run_all should contain: selected_idea, combined_context, and optionally research_agents, num_rounds
+                backendPayload = payload;
+                break;
             case 'get_summary':
                 endpoint = '/research/summary';
                  // Payload for get_summary should contain: research_results, selected_idea